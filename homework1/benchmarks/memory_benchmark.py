@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+from typing import List, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import generate_market_list
+from src.utils.coin_table import CoinTable
+
+# Loads one pickled coin list in a fresh interpreter, like an API worker at startup.
+LOAD_CODE = """
+import json, pickle, sys, tracemalloc
+sys.path.insert(0, sys.argv[2])
+import src.utils.coin_table
+
+def rss():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+before = rss()
+tracemalloc.start()
+with open(sys.argv[1], 'rb') as f:
+    coins = pickle.load(f)
+traced = tracemalloc.get_traced_memory()[0]
+after = rss()
+print(json.dumps({'traced': traced, 'rss': after - before if before is not None else None}))
+"""
+
+
+def market_records(n_coins: int) -> List[Dict]:
+    """Plain Python records, as build_snapshot produces them from the CSV."""
+    df = generate_market_list(n_coins)
+    df = df.astype(object).where(df.notna(), None)
+    return [
+        {k: (v.item() if hasattr(v, 'item') else v) for k, v in record.items()}
+        for record in df.to_dict(orient='records')
+    ]
+
+
+def measure(path: str) -> Dict:
+    output = subprocess.run([sys.executable, "-c", LOAD_CODE, path, ROOT],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker memory of the coin list: dicts vs CoinTable")
+    parser.add_argument('--sizes', default="1000,5000,15000,50000", help="comma separated coin counts")
+    parser.add_argument('--output', default=None, help="also write results as JSON here")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="crypto-memory-") as folder:
+        for n_coins in [int(n) for n in args.sizes.split(',')]:
+            records = market_records(n_coins)
+            layouts = {
+                # Layout before the columnar table: one dict per coin plus an id index
+                'dicts': {'cryptos_list': records, 'index_by_id': {c['id']: i for i, c in enumerate(records)}},
+                'table': CoinTable.from_records(records),
+            }
+            row = {'coins': n_coins}
+            for name, data in layouts.items():
+                path = os.path.join(folder, f"{name}-{n_coins}.pkl")
+                with open(path, 'wb') as f:
+                    pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                measured = measure(path)
+                row[f'{name}_traced_mb'] = measured['traced'] / 1e6
+                row[f'{name}_rss_mb'] = measured['rss'] / 1e6 if measured['rss'] is not None else None
+                row[f'{name}_pickle_mb'] = os.path.getsize(path) / 1e6
+            results.append(row)
+
+            print(f"{n_coins:>7} coins  dicts {row['dicts_traced_mb']:8.2f} MB  "
+                  f"table {row['table_traced_mb']:8.2f} MB  "
+                  f"({row['dicts_traced_mb'] / max(row['table_traced_mb'], 1e-9):.1f}x smaller, "
+                  f"{row['table_traced_mb'] * 1e6 / n_coins:.0f} B/coin)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
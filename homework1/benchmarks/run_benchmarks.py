@@ -0,0 +1,244 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Dict, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "..", "homework2"))
+
+from benchmarks.synthetic import write_dataset, market_records
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+# Scenarios that return their own duration instead of being timed from outside.
+SELF_TIMED = {'api.cold_start'}
+
+
+def time_scenario(func: Callable, repeat: int = 5, warmup: int = 1, self_timed: bool = False,
+                  min_sample: float = 0.02) -> Dict:
+    for _ in range(warmup):
+        func()
+
+    # Sub-millisecond scenarios are looped so each sample lasts at least
+    # `min_sample` seconds; single calls that short are mostly timer and scheduler noise.
+    number = 1
+    if not self_timed:
+        start = time.perf_counter()
+        func()
+        number = max(1, math.ceil(min_sample / max(time.perf_counter() - start, 1e-9)))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            measured = func()
+        timings.append(measured if self_timed else (time.perf_counter() - start) / number)
+
+    return {
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'max': max(timings),
+        'repeat': repeat,
+        'number': number
+    }
+
+
+# Flask's own import cost is outside our control, so the clock starts after it.
+COLD_START_CODE = """
+import sys, time
+import flask, flask_cors
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import app
+app.app.test_client().get('/api/cryptos')
+print(time.perf_counter() - start)
+"""
+
+
+def cold_start_seconds() -> float:
+    """Fresh interpreter: import app.py and serve the first /api/cryptos request."""
+    output = subprocess.run(
+        [sys.executable, "-c", COLD_START_CODE, os.path.join(ROOT, "..", "homework2")],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def build_scenarios(dataset: Dict, sample: int) -> Dict[str, Callable]:
+    from src.utils.csv_manager import CSVManager
+    from src.filters.filter_1 import Filter1
+    from src.filters.filter_3 import Filter3
+
+    history_ids = dataset['history_ids'][:sample]
+    csv_manager = CSVManager()
+    filter1 = Filter1()
+    filter3 = Filter3()
+    markets = market_records(dataset['n_coins'])
+    new_row = [{'date': '2025-11-24', 'open': 1.0, 'high': 1.1, 'low': 0.9, 'close': 1.05,
+                'volume': 1000.0, 'source': 'synthetic', 'price': 1.05}]
+
+    scenarios = {
+        'csv_manager.get_last_date': lambda: [csv_manager.get_last_date_for_crypto(c) for c in history_ids],
+        'csv_manager.append_one_row': lambda: [csv_manager.append_historical_data(c, new_row) for c in history_ids],
+        'filter1.filter_invalid': lambda: filter1.filter_invalid_cryptocurrencies(markets),
+        'filter3.format_and_clean': lambda: [filter3.format_and_clean_data(c) for c in history_ids],
+        'filter3.calculate_statistics': lambda: [filter3.calculate_statistics(c) for c in history_ids],
+    }
+
+    # app.py loads the coin list at import time, relative to the working directory.
+    import app as api
+    client = api.app.test_client()
+    first_id = history_ids[0] if history_ids else dataset['history_ids'][0]
+
+    archived_at = "2025-11-23T12:00:00Z"
+    routes = {
+        'api./metrics': "/metrics",
+        'api./api/metrics': "/api/metrics",
+        'api./api/cryptos': "/api/cryptos",
+        'api./api/cryptos?sort&limit': "/api/cryptos?sort=price_change_percentage_24h&order=desc&min_market_cap=1e6&limit=100",
+        'api./api/cryptos/top/<limit>': "/api/cryptos/top/100",
+        'api./api/cryptos/search': "/api/cryptos/search?q=coin 1",
+        'api./api/cryptos/<crypto_id>': f"/api/cryptos/{first_id}",
+        'api./api/cryptos/<crypto_id>/history': f"/api/cryptos/{first_id}/history",
+        'api./api/cryptos/<crypto_id>/statistics': f"/api/cryptos/{first_id}/statistics",
+        'api./api/cryptos/<crypto_id>/indicators': f"/api/cryptos/{first_id}/indicators",
+        'api./api/indicators': "/api/indicators",
+        'api./api/cryptos/<crypto_id>/tiles': f"/api/cryptos/{first_id}/tiles?start=2024-11-23&points=800",
+        'api./api/cryptos/<crypto_id>/backtest': f"/api/cryptos/{first_id}/backtest?strategy=sma_crossover",
+        'api./api/cryptos/<crypto_id>/backtest/sweep':
+            f"/api/cryptos/{first_id}/backtest/sweep?strategy=sma_crossover&fast=5,10,20&slow=50,100,200",
+        'api./api/archive': "/api/archive",
+        'api./api/archive/snapshot': f"/api/archive/snapshot?at={archived_at}",
+        'api./api/cryptos/<crypto_id>/archive': f"/api/cryptos/{first_id}/archive?field=current_price",
+        'api./api/stats': "/api/stats",
+    }
+    for name, url in routes.items():
+        scenarios[name] = lambda url=url: client.get(url).get_data()
+
+    # Tile URLs carry a content hash, so the warmup call looks one up. Not while
+    # building: a request here would start the app's feed thread before the
+    # pipeline scenarios are timed.
+    tile_urls = []
+
+    def get_tile():
+        if not tile_urls:
+            tile_urls.append(client.get(routes['api./api/cryptos/<crypto_id>/tiles']).get_json()['tiles'][-1]['url'])
+        return client.get(tile_urls[0]).get_data()
+    scenarios['api./api/cryptos/<crypto_id>/tiles/<resolution>/<index>/<hash>'] = get_tile
+
+    def open_stream():
+        # Connect and receive the first event; closing the response unsubscribes
+        response = client.get("/api/stream", buffered=False)
+        next(iter(response.response))
+        response.close()
+    scenarios['api./api/stream'] = open_stream
+
+    scenarios['api.cold_start'] = cold_start_seconds
+
+    # One simulated market tick diffed and fanned out to 1000 open dashboards
+    from src.utils.live_feed import LiveFeed, SimulatedPriceSource
+    source = SimulatedPriceSource(api.cryptos_table)
+    feed = LiveFeed(api.cryptos_table)
+    subscribers = [feed.subscribe() for _ in range(1000)]
+    scenarios['live_feed.publish_1000_clients'] = lambda: (feed.publish(source.tick()),
+                                                           [s.take() for s in subscribers])
+
+    return scenarios
+
+
+def scale_key(args) -> str:
+    # :g so that --years 10 and a stored years=10 name the same scale
+    return f"coins={args.coins},years={args.years:g},history={args.history_coins},sample={args.sample}"
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        ratio = result['median'] / reference['median'] if reference['median'] > 0 else float('inf')
+        result['baseline_median'] = reference['median']
+        result['ratio'] = ratio
+        if ratio > threshold:
+            regressions.append({'scenario': name, 'ratio': ratio})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks on a synthetic market dataset")
+    parser.add_argument('--coins', type=int, default=1000, help="coins in the market list (1k-100k)")
+    parser.add_argument('--years', type=float, default=10, help="years of daily history per coin (1-20)")
+    parser.add_argument('--history-coins', type=int, default=100, help="coins that get a history file")
+    parser.add_argument('--sample', type=int, default=20, help="coins touched by the per-coin scenarios")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', default=None, help="run only scenarios whose name contains this")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=1.3, help="median ratio that counts as a regression")
+    parser.add_argument('--output', default=None, help="also write results as JSON here")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="crypto-bench-")
+    start = time.perf_counter()
+    dataset = write_dataset(os.path.join(workdir, "data"), n_coins=args.coins, years=args.years,
+                            history_coins=args.history_coins)
+    print(f"Synthetic dataset in {workdir} ({time.perf_counter() - start:.1f}s)")
+
+    os.chdir(workdir)
+    try:
+        scenarios = build_scenarios(dataset, args.sample)
+
+        results = {}
+        for name, func in scenarios.items():
+            if args.only and args.only not in name:
+                continue
+            results[name] = time_scenario(func, repeat=args.repeat, self_timed=name in SELF_TIMED)
+            print(f"{name:45s} median {results[name]['median'] * 1000:10.2f} ms")
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    key = scale_key(args)
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+
+    regressions = compare(results, baselines.get(key, {}), args.threshold)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'scale': key, 'results': results, 'regressions': regressions}, f, indent=2)
+
+    if args.save_baseline:
+        baselines.setdefault(key, {}).update({name: {'median': r['median']} for name, r in results.items()})
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Baseline saved for {key}")
+        return
+
+    if key not in baselines:
+        print(f"No baseline for {key}; run with --save-baseline to create one")
+        sys.exit(1)
+
+    for name, result in results.items():
+        if 'ratio' in result:
+            print(f"{name:45s} {result['ratio']:6.2f}x baseline")
+        else:
+            print(f"{name:45s} no baseline yet (--save-baseline)")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.2f}x")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
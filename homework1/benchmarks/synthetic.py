@@ -0,0 +1,149 @@
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import List, Dict
+from src.utils.startup_snapshot import write_snapshot
+from src.utils.snapshot_archive import SnapshotArchive
+
+MARKET_COLUMNS = [
+    'id', 'symbol', 'name', 'image', 'current_price', 'market_cap', 'market_cap_rank',
+    'fully_diluted_valuation', 'total_volume', 'high_24h', 'low_24h', 'price_change_24h',
+    'price_change_percentage_24h', 'market_cap_change_24h', 'market_cap_change_percentage_24h',
+    'circulating_supply', 'total_supply', 'max_supply', 'ath', 'ath_change_percentage', 'ath_date',
+    'atl', 'atl_change_percentage', 'atl_date', 'roi', 'last_updated'
+]
+
+
+def coin_id(i: int) -> str:
+    return f"synthetic-coin-{i:06d}"
+
+
+def generate_market_list(n_coins: int, seed: int = 0, as_of: datetime = None) -> pd.DataFrame:
+    """Market list with the same columns and rough distributions as CoinGecko /coins/markets."""
+    rng = np.random.default_rng(seed)
+    as_of = as_of or datetime(2025, 11, 23, 16, 20)
+
+    # Market caps follow a power law: a few giants and a long tail.
+    market_cap = np.sort(1e12 * np.arange(1, n_coins + 1) ** -1.6 * rng.lognormal(0, 0.2, n_coins))[::-1]
+    price = np.exp(rng.uniform(np.log(1e-6), np.log(1e5), n_coins))
+    supply = market_cap / price
+    change_pct = rng.standard_t(3, n_coins) * 3
+    volume = market_cap * rng.uniform(0.005, 0.3, n_coins)
+    ath = price * rng.uniform(1, 20, n_coins)
+    atl = price * rng.uniform(0.001, 1, n_coins)
+
+    ids = [coin_id(i) for i in range(n_coins)]
+    timestamp = as_of.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+    df = pd.DataFrame({
+        'id': ids,
+        # Symbols repeat occasionally, as they do upstream, to exercise deduplication.
+        'symbol': [f"s{i % max(1, int(n_coins * 0.95)):x}" for i in range(n_coins)],
+        'name': [f"Synthetic Coin {i}" for i in range(n_coins)],
+        'image': [f"https://coin-images.coingecko.com/coins/images/{i}/large/{cid}.png?1696501400"
+                  for i, cid in enumerate(ids)],
+        'current_price': price,
+        'market_cap': market_cap.astype(np.int64),
+        'market_cap_rank': np.arange(1, n_coins + 1),
+        'fully_diluted_valuation': market_cap * rng.uniform(1, 3, n_coins),
+        'total_volume': volume,
+        'high_24h': price * (1 + np.abs(change_pct) / 100),
+        'low_24h': price * (1 - np.abs(change_pct) / 200),
+        'price_change_24h': price * change_pct / 100,
+        'price_change_percentage_24h': change_pct,
+        'market_cap_change_24h': market_cap * change_pct / 100,
+        'market_cap_change_percentage_24h': change_pct * rng.uniform(0.9, 1.1, n_coins),
+        'circulating_supply': supply,
+        'total_supply': supply * rng.uniform(1, 2, n_coins),
+        'max_supply': np.where(rng.random(n_coins) < 0.4, supply * 2, np.nan),
+        'ath': ath,
+        'ath_change_percentage': (price / ath - 1) * 100,
+        'ath_date': timestamp,
+        'atl': atl,
+        'atl_change_percentage': (price / atl - 1) * 100,
+        'atl_date': timestamp,
+        'roi': None,
+        'last_updated': timestamp
+    })
+    return df[MARKET_COLUMNS]
+
+
+def generate_history(years: float, seed: int = 0, end_date: datetime = None,
+                     start_price: float = 100.0, gap_probability: float = 0.0) -> pd.DataFrame:
+    """Daily OHLCV from a geometric random walk, in the format Filter2 writes."""
+    rng = np.random.default_rng(seed)
+    end_date = end_date or datetime(2025, 11, 23)
+    n_days = max(2, int(years * 365.25))
+    dates = pd.date_range(end=end_date, periods=n_days, freq='D')
+
+    log_returns = rng.normal(0.0005, 0.04, n_days)
+    close = start_price * np.exp(np.cumsum(log_returns))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.02, n_days))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.lognormal(16, 1, n_days)
+
+    df = pd.DataFrame({
+        'date': dates.strftime('%Y-%m-%d'),
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+        'source': 'synthetic',
+        'price': close
+    })
+
+    if gap_probability > 0:
+        df = df[rng.random(n_days) >= gap_probability]
+
+    return df.reset_index(drop=True)
+
+
+def write_dataset(base_path: str, n_coins: int = 1000, years: float = 10,
+                  history_coins: int = 200, seed: int = 0, archive_snapshots: int = 24) -> Dict:
+    """
+    Writes raw/top_cryptocurrencies.csv, historical/<id>.csv and an hourly
+    archive/ of the last `archive_snapshots` coin lists under `base_path`,
+    laid out exactly like the pipeline's data/ folder.
+
+    Only the first `history_coins` coins get a history file, which keeps the
+    100k-coin market lists practical on disk.
+    """
+    os.makedirs(f"{base_path}/raw", exist_ok=True)
+    os.makedirs(f"{base_path}/processed", exist_ok=True)
+    os.makedirs(f"{base_path}/historical", exist_ok=True)
+
+    market = generate_market_list(n_coins, seed=seed)
+    market.to_csv(f"{base_path}/raw/top_cryptocurrencies.csv", index=False)
+    write_snapshot(f"{base_path}/raw/top_cryptocurrencies.csv", f"{base_path}/processed/startup_snapshot.pkl")
+
+    # Hourly runs up to the current list, prices drifting between them
+    rng = np.random.default_rng(seed)
+    archive = SnapshotArchive(base_path)
+    end = pd.Timestamp(market['last_updated'][0])
+    snapshot = market.copy()
+    for hours_before in range(archive_snapshots - 1, -1, -1):
+        snapshot['current_price'] = market['current_price'] * (1 + rng.normal(0, 0.01, n_coins) * hours_before)
+        archive.append(snapshot.replace({np.nan: None}).to_dict('records'),
+                       timestamp=(end - pd.Timedelta(hours=hours_before)).timestamp())
+
+    history_ids = list(market['id'][:history_coins])
+    for i, crypto_id in enumerate(history_ids):
+        history = generate_history(years, seed=seed + i + 1, start_price=float(market['current_price'][i]),
+                                   gap_probability=0.01)
+        history.to_csv(f"{base_path}/historical/{crypto_id}.csv", index=False)
+
+    return {
+        'base_path': base_path,
+        'n_coins': n_coins,
+        'years': years,
+        'history_ids': history_ids
+    }
+
+
+def market_records(n_coins: int, seed: int = 0) -> List[Dict]:
+    df = generate_market_list(n_coins, seed=seed)
+    return df.replace({np.nan: None}).to_dict('records')
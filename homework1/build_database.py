@@ -0,0 +1,18 @@
+import argparse
+import time
+from src.utils.sql_store import SQLStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load data/raw and data/historical into the SQLite store")
+    parser.add_argument('--database', default="data/crypto.db")
+    parser.add_argument('--data', default="data")
+    args = parser.parse_args()
+
+    start = time.time()
+    imported = SQLStore(args.database).import_csv_folder(args.data)
+    print(f"{imported} histories imported into {args.database} in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 import time
-import pandas as pd
 from datetime import datetime
 from src.filters.filter_1 import Filter1
 from src.filters.filter_2 import Filter2
 from src.filters.filter_3 import Filter3
+from src.utils.metrics import metrics
+from src.utils.quality_audit import QualityAuditor
+from src.utils.http_cache import HTTPCache
+from typing import Dict
 
 class CryptoDataPipeline: 
     def __init__(self):
@@ -15,10 +18,18 @@ class CryptoDataPipeline:
     
     def run_complete_pipeline(self, target_cryptos: int = 10, test_mode: bool = True):
         
+        with metrics.span('pipeline', target_cryptos=target_cryptos, test_mode=test_mode):
+            self.run_filters(target_cryptos, test_mode)
+        
+        self.generate_final_report()
+    
+    def run_filters(self, target_cryptos: int, test_mode: bool):
+        
         total_start_time = time.time()
         
         filter1_start = time.time()
-        filter1_results = self.filter1.process(target_count=target_cryptos)
+        with metrics.span('filter1'):
+            filter1_results = self.filter1.process(target_count=target_cryptos)
         filter1_time = time.time() - filter1_start
         
         self.execution_times['filter1'] = filter1_time
@@ -33,10 +44,11 @@ class CryptoDataPipeline:
         time.sleep(2)
         
         filter2_start = time.time()
-        if test_mode:
-            filter2_results = self.filter2.process(test_limit=10)  
-        else:
-            filter2_results = self.filter2.process() 
+        with metrics.span('filter2'):
+            if test_mode:
+                filter2_results = self.filter2.process(test_limit=10)  
+            else:
+                filter2_results = self.filter2.process() 
         filter2_time = time.time() - filter2_start
         
         self.execution_times['filter2'] = filter2_time
@@ -53,7 +65,8 @@ class CryptoDataPipeline:
         time.sleep(2)
         
         filter3_start = time.time()
-        filter3_results = self.filter3.process(test_mode=test_mode)
+        with metrics.span('filter3'):
+            filter3_results = self.filter3.process(test_mode=test_mode)
         filter3_time = time.time() - filter3_start
         
         self.execution_times['filter3'] = filter3_time
@@ -65,53 +78,62 @@ class CryptoDataPipeline:
         
         total_time = time.time() - total_start_time
         self.execution_times['total'] = total_time
-        
-        self.generate_final_report()
     
-    def generate_final_report(self):
+    def generate_final_report(self, report_path: str = "data/processed/run_report.json",
+                              prometheus_path: str = "data/processed/metrics.prom"):
+        
+        summary = {
+            'execution_times': self.execution_times,
+            'pipeline_results': self.pipeline_results
+        }
         
         if 'filter2' in self.pipeline_results:
             total_records = self.pipeline_results['filter2']['total_records']
             
             if self.pipeline_results['filter2']['cryptos_processed'] > 0:
                 avg_records = total_records / self.pipeline_results['filter2']['cryptos_processed']
+                summary['avg_records'] = avg_records
         
-        total_cryptos = self.pipeline_results['filter1']['cryptos_processed']
-        total_time = self.execution_times['total']
+        total_cryptos = self.pipeline_results.get('filter1', {}).get('cryptos_processed', 0)
+        total_time = self.execution_times.get('total', 0)
         
         if total_time > 0 and total_cryptos > 0:
             cryptos_per_second = total_cryptos / total_time
+            summary['cryptos_per_second'] = cryptos_per_second
+        
+        # Where the wall-clock time went, summed over all stages and coins.
+        all_time = metrics.histogram_sums()
+        summary['time_by_kind'] = {
+            name: all_time.get(name, 0) for name in ('network_seconds', 'parse_seconds', 'write_seconds')
+        }
+        summary['errors_by_class'] = metrics.totals_by('errors_total', 'error')
+        
+        metrics.write_report(report_path, extra=summary)
+        with open(prometheus_path, 'w') as f:
+            f.write(metrics.to_prometheus())
+        
+        return summary
     
-    def check_data_quality(self):
+    def check_data_quality(self, write_quarantine: bool = True) -> Dict:
         
-        try:
-            import os
-            import glob
-
-            historical_files = glob.glob("data/historical/*.csv")
-            
-            if historical_files:
-                sample_files = historical_files[:3]
-                for file_path in sample_files:
-                    crypto_name = os.path.basename(file_path).replace('.csv', '')
-                    df = pd.read_csv(file_path)
-                    
-                    if 'price' in df.columns:
-                        print("x")
-                    
-                    if len(df) > 0:
-                        date_range = (pd.to_datetime(df['date'].max()) - pd.to_datetime(df['date'].min())).days
-                        print("x")
-            
-            main_list_path = "data/raw/top_cryptocurrencies.csv"
-            if os.path.exists(main_list_path):
-                df_main = pd.read_csv(main_list_path)
-            
-        except Exception as e:
-            print("x")
+        auditor = QualityAuditor()
+        results = auditor.audit_corpus()
+        report_path = auditor.write_report(write_quarantine=write_quarantine)
+        
+        quarantined = [r['crypto_id'] for r in results if r.get('quarantine')]
+        self.pipeline_results['quality'] = {
+            'cryptos_audited': len(results),
+            'cryptos_quarantined': len(quarantined),
+            'report_path': report_path
+        }
+        
+        return self.pipeline_results['quality']
 
 def main():
     
+    # Drop cached upstream responses nobody has used for a month
+    HTTPCache().prune()
+    
     pipeline = CryptoDataPipeline()
     
     pipeline.run_complete_pipeline(
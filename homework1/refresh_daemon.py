@@ -0,0 +1,54 @@
+import argparse
+import json
+from src.filters.filter_2 import Filter2
+from src.utils.http_cache import HTTPCache
+from src.utils.refresh_scheduler import RefreshScheduler, YahooRefreshFetcher, simulate
+
+
+def build_scheduler(requests_per_hour: int, burst: int, min_interval: float) -> RefreshScheduler:
+    filter2 = Filter2()
+    csv_manager = filter2.csv_manager
+
+    cryptocurrencies = filter2.load_cryptocurrencies()
+    last_dates = {c['id']: csv_manager.get_last_date_for_crypto(c['id']) for c in cryptocurrencies}
+
+    scheduler = RefreshScheduler(
+        YahooRefreshFetcher(filter2, csv_manager),
+        requests_per_hour=requests_per_hour,
+        burst=burst,
+        min_interval=min_interval
+    )
+    scheduler.load_cryptocurrencies(cryptocurrencies, last_dates)
+    return scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep data/historical fresh within a request budget")
+    parser.add_argument('--requests-per-hour', type=int, default=600)
+    parser.add_argument('--burst', type=int, default=10)
+    parser.add_argument('--min-interval', type=float, default=300, help="refresh interval of the #1 coin, in seconds")
+    parser.add_argument('--duration', type=float, default=None, help="stop after this many seconds")
+    parser.add_argument('--simulate', type=float, default=None, metavar='HOURS',
+                        help="run offline with a fake clock and fake upstream instead")
+    args = parser.parse_args()
+
+    if args.simulate is not None:
+        cryptocurrencies = Filter2().load_cryptocurrencies()
+        result = simulate(cryptocurrencies, hours=args.simulate, requests_per_hour=args.requests_per_hour,
+                          burst=args.burst, min_interval=args.min_interval)
+        top = [s for s in result['status'] if s['rank'] <= 10]
+        print(json.dumps({
+            'requests_used': result['requests_used'],
+            'max_requests_in_hour': result['max_requests_in_hour'],
+            'top10_max_staleness_minutes': max(result['max_staleness'].get(s['crypto_id'], 0) for s in top) / 60,
+            'all_max_staleness_hours': max(result['max_staleness'].values()) / 3600
+        }, indent=2))
+        return
+
+    HTTPCache().prune()
+    scheduler = build_scheduler(args.requests_per_hour, args.burst, args.min_interval)
+    scheduler.run_forever(duration=args.duration)
+
+
+if __name__ == "__main__":
+    main()
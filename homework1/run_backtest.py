@@ -0,0 +1,42 @@
+import argparse
+import json
+import time
+from src.filters.filter_2 import Filter2
+from src.utils.backtest import STRATEGIES, sweep_universe
+
+
+def parse_grid(values):
+    grid = {}
+    for item in values or []:
+        key, _, numbers = item.partition('=')
+        grid[key] = [float(v) for v in numbers.split(',')]
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweep of an indicator strategy over every coin")
+    parser.add_argument('--strategy', default='sma_crossover', choices=sorted(STRATEGIES))
+    parser.add_argument('--grid', nargs='*', metavar='PARAM=V1,V2', help="e.g. fast=10,20 slow=50,100,200")
+    parser.add_argument('--fee', type=float, default=0.001)
+    parser.add_argument('--slippage', type=float, default=0.0005)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default="data/processed/backtest_sweep.json")
+    args = parser.parse_args()
+
+    grid = {key: [value] for key, value in STRATEGIES[args.strategy].items()}
+    grid.update(parse_grid(args.grid))
+
+    crypto_ids = [c['id'] for c in Filter2().load_cryptocurrencies()]
+
+    start = time.time()
+    results = sweep_universe(crypto_ids, args.strategy, grid, args.fee, args.slippage, workers=args.workers)
+    results = [r for r in results if r['best']]
+
+    with open(args.output, 'w') as f:
+        json.dump({'strategy': args.strategy, 'grid': grid, 'coins': results}, f)
+
+    print(f"{len(results)} coins swept in {time.time() - start:.1f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
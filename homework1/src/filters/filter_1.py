@@ -2,7 +2,7 @@ import pandas as pd
 from typing import List, Dict
 from src.utils.api_client import CoinGeckoClient
 from src.utils.csv_manager import CSVManager
-import time
+from src.utils.metrics import metrics
 
 class Filter1:
     
@@ -28,24 +28,26 @@ class Filter1:
                 'sparkline': False
             }
             
-            time.sleep(self.api_client.request_delay)
-            
             try:
-                response = self.api_client.session.get(url, params=params)
+                with metrics.timer('network_seconds', stage='filter1'):
+                    response = self.api_client.session.get(url, params=params)
+                metrics.inc('requests_total', stage='filter1', status=response.status_code)
+                metrics.inc('bytes_total', len(response.content), stage='filter1')
                 response.raise_for_status()
                 
-                page_data = response.json()
+                with metrics.timer('parse_seconds', stage='filter1'):
+                    page_data = response.json()
                 
                 if not page_data:
-                    print("x")
                     break
                 
                 all_cryptos.extend(page_data)
+                metrics.inc('rows_total', len(page_data), stage='filter1')
                 
                 page += 1
                 
             except Exception as e:
-                print(f"x")
+                metrics.error('filter1', e)
                 break
         
         return all_cryptos[:target_count] 
@@ -85,6 +87,8 @@ class Filter1:
             else:
                 rejected_count += 1
         
+        metrics.inc('rejected_total', rejected_count, stage='filter1')
+        
         if rejected_count > len(cryptocurrencies) * 0.5:  
             print("!")
         
@@ -99,6 +103,6 @@ class Filter1:
             self.csv_manager.save_cryptocurrency_list(valid_cryptos)
             self.processed_data = valid_cryptos
         else:
-            print("x")
+            metrics.inc('errors_total', stage='filter1', error='NoValidCryptocurrencies')
         
         return valid_cryptos
\ No newline at end of file
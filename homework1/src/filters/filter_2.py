@@ -1,16 +1,18 @@
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Optional
 from src.utils.csv_manager import CSVManager
+from src.utils.metrics import metrics
 import time
 from datetime import datetime
 import os
-import yfinance as yf
+from src.utils.http_cache import CachedYahooHistory
 
 class Filter2:
     def __init__(self):
         self.csv_manager = CSVManager()
         self.processed_count = 0
         self.successful_count = 0
+        self.yahoo = CachedYahooHistory()
     
     def load_cryptocurrencies(self) -> List[Dict]:
         try:
@@ -48,31 +50,42 @@ class Filter2:
             special_symbol = special_mappings[symbol.lower()]
             symbol_formats.insert(0, special_symbol) 
         
-        for sym_format in symbol_formats:
+        for attempt, sym_format in enumerate(symbol_formats):
+            if attempt > 0:
+                metrics.inc('retries_total', stage='filter2', coin=crypto['id'])
             try:
-                ticker = yf.Ticker(sym_format)
-                hist_data = ticker.history(period="7d") 
+                with metrics.timer('network_seconds', stage='filter2', coin=crypto['id']):
+                    hist_data = self.yahoo.history(sym_format, period="7d")
                 
                 if not hist_data.empty and len(hist_data) > 0:
                     return sym_format
                 else:
-                    print("x")
+                    metrics.inc('empty_responses_total', stage='filter2')
             except Exception as e:
-                print("x")
+                metrics.error('filter2', e)
         return None
-        
+    
     def fetch_historical_data(self, crypto: Dict, yahoo_symbol: str) -> List[Dict]:
         try:
-            ticker = yf.Ticker(yahoo_symbol)
-            
-            hist_data = ticker.history(period="10y") 
+            with metrics.timer('network_seconds', stage='filter2', coin=crypto['id']):
+                hist_data = self.yahoo.history(yahoo_symbol, period="10y")
             
             if hist_data.empty:
-                hist_data = ticker.history(period="max")
+                metrics.inc('retries_total', stage='filter2', coin=crypto['id'])
+                with metrics.timer('network_seconds', stage='filter2', coin=crypto['id']):
+                    hist_data = self.yahoo.history(yahoo_symbol, period="max")
             
             if hist_data.empty:
                 return []
             
+            return self.rows_from_history(hist_data, 'yahoo_10_years', crypto['id'])
+            
+        except Exception as e:
+            metrics.error('filter2', e, coin=crypto['id'])
+            return []
+    
+    def rows_from_history(self, hist_data: pd.DataFrame, source: str, crypto_id: str = None) -> List[Dict]:
+        with metrics.timer('parse_seconds', stage='filter2', coin=crypto_id):
             historical_data = []
             for date, row in hist_data.iterrows():
                 historical_data.append({
@@ -82,18 +95,27 @@ class Filter2:
                     'low': float(row['Low']),
                     'close': float(row['Close']),
                     'volume': float(row['Volume']),
-                    'source': 'yahoo_10_years'
+                    'source': source
                 })
+        
+        metrics.inc('rows_total', len(historical_data), stage='filter2', coin=crypto_id)
+        return historical_data
+    
+    def fetch_recent_data(self, yahoo_symbol: str, last_date: str = None) -> List[Dict]:
+        try:
+            with metrics.timer('network_seconds', stage='refresh'):
+                if last_date:
+                    hist_data = self.yahoo.history(yahoo_symbol, refresh=True, start=last_date)
+                else:
+                    hist_data = self.yahoo.history(yahoo_symbol, refresh=True, period="10y")
             
-            if historical_data:
-                start_date = historical_data[0]['date']
-                end_date = historical_data[-1]['date']
-                total_days = len(historical_data)
-                years = total_days / 365.25
-                
-            return historical_data
+            if hist_data.empty:
+                return []
+            
+            return self.rows_from_history(hist_data, 'yahoo_refresh')
             
         except Exception as e:
+            metrics.error('refresh', e)
             return []
     
     def process(self, test_mode: bool = False, test_limit: int = None) -> Dict:
@@ -119,8 +141,10 @@ class Filter2:
         
         for batch_num, batch in enumerate(batches, 1):
             batch_start = time.time()
+            network_calls = self.yahoo.network_calls
             
-            batch_results = self.process_crypto_batch(batch, batch_num)
+            with metrics.span('filter2.batch', batch=batch_num, size=len(batch)):
+                batch_results = self.process_crypto_batch(batch, batch_num)
             all_results.extend(batch_results)
             
             batch_time = time.time() - batch_start
@@ -131,7 +155,8 @@ class Filter2:
             
             print(f"✅ Батч {batch_num}/{len(batches)} завршен: {success_rate:.1f}% успешност")
             
-            if batch_num < len(batches):
+            # Batches answered entirely from the HTTP cache don't need to spare Yahoo
+            if batch_num < len(batches) and self.yahoo.network_calls > network_calls:
                 pause_time = 15  # подолга пауза помеѓу батчови
                 print(f"⏳ Пауза од {pause_time} секунди...")
                 time.sleep(pause_time)
@@ -184,56 +209,69 @@ class Filter2:
         results = []
         
         for crypto in batch:
-            self.processed_count += 1
-            
-            crypto_id = crypto['id']
-            crypto_name = crypto['name']
-            crypto_symbol = crypto['symbol']
-            
-            existing_data = self.csv_manager.get_last_date_for_crypto(crypto_id)
-            if existing_data:
-                last_date_obj = datetime.strptime(existing_data, '%Y-%m-%d')
-                days_since_last = (datetime.now() - last_date_obj).days
-                if days_since_last <= 7:
-                    continue 
-            
-            yahoo_symbol = self.get_best_yahoo_symbol(crypto)
-            
-            if not yahoo_symbol:
-                results.append({
-                    'crypto_id': crypto_id,
-                    'crypto_name': crypto_name,
-                    'status': 'NO_YAHOO_SYMBOL',
-                    'records_count': 0
-                })
-                continue
+            network_calls = self.yahoo.network_calls
+            with metrics.span('filter2.crypto', coin=crypto['id'], batch=batch_num) as span:
+                result = self.process_crypto(crypto)
             
-            historical_data = self.fetch_historical_data(crypto, yahoo_symbol)
+            status = result['status'] if result else 'FRESH'
+            span['attributes']['status'] = status
+            metrics.inc('cryptos_total', stage='filter2', status=status)
             
-            is_valid = self.validate_historical_data(historical_data, crypto_name)
+            if result is None:
+                continue
             
-            if historical_data and is_valid:
-                self.csv_manager.save_historical_data(crypto_id, historical_data)
-                self.successful_count += 1
-                
-                results.append({
-                    'crypto_id': crypto_id,
-                    'crypto_name': crypto_name,
-                    'status': 'SUCCESS',
-                    'records_count': len(historical_data),
-                    'yahoo_symbol': yahoo_symbol,
-                    'data_years': len(historical_data) / 365.25,
-                    'date_range': f"{historical_data[0]['date']} до {historical_data[-1]['date']}"
-                })
-                
-            else:
-                results.append({
-                    'crypto_id': crypto_id,
-                    'crypto_name': crypto_name,
-                    'status': 'INSUFFICIENT_DATA',
-                    'records_count': len(historical_data) if historical_data else 0
-                })
+            results.append(result)
             
-            time.sleep(3)  
+            if status != 'NO_YAHOO_SYMBOL' and self.yahoo.network_calls > network_calls:
+                time.sleep(3)  
+        
+        return results
+    
+    def process_crypto(self, crypto: Dict) -> Optional[Dict]:
+        self.processed_count += 1
+        
+        crypto_id = crypto['id']
+        crypto_name = crypto['name']
+        crypto_symbol = crypto['symbol']
+        
+        existing_data = self.csv_manager.get_last_date_for_crypto(crypto_id)
+        if existing_data:
+            last_date_obj = datetime.strptime(existing_data, '%Y-%m-%d')
+            days_since_last = (datetime.now() - last_date_obj).days
+            if days_since_last <= 7:
+                return None 
         
-        return results
\ No newline at end of file
+        yahoo_symbol = self.get_best_yahoo_symbol(crypto)
+        
+        if not yahoo_symbol:
+            return {
+                'crypto_id': crypto_id,
+                'crypto_name': crypto_name,
+                'status': 'NO_YAHOO_SYMBOL',
+                'records_count': 0
+            }
+        
+        historical_data = self.fetch_historical_data(crypto, yahoo_symbol)
+        
+        is_valid = self.validate_historical_data(historical_data, crypto_name)
+        
+        if historical_data and is_valid:
+            self.csv_manager.save_historical_data(crypto_id, historical_data)
+            self.successful_count += 1
+            
+            return {
+                'crypto_id': crypto_id,
+                'crypto_name': crypto_name,
+                'status': 'SUCCESS',
+                'records_count': len(historical_data),
+                'yahoo_symbol': yahoo_symbol,
+                'data_years': len(historical_data) / 365.25,
+                'date_range': f"{historical_data[0]['date']} до {historical_data[-1]['date']}"
+            }
+        
+        return {
+            'crypto_id': crypto_id,
+            'crypto_name': crypto_name,
+            'status': 'INSUFFICIENT_DATA',
+            'records_count': len(historical_data) if historical_data else 0
+        }
@@ -2,6 +2,8 @@ import pandas as pd
 from typing import List, Dict, Optional
 from src.utils.api_client import CoinGeckoClient
 from src.utils.csv_manager import CSVManager
+from src.utils.metrics import metrics
+from src.utils.rollups import RollupStore
 import time
 from datetime import datetime, timedelta
 import os
@@ -11,27 +13,35 @@ class Filter3:
         self.api_client = CoinGeckoClient()
         self.csv_manager = CSVManager()
         self.base_path = "data"
+        self.rollup_store = RollupStore(self.base_path)
         self.results = []
     
     def load_cryptocurrencies_from_filter1(self) -> List[Dict]:
         file_path = f"{self.base_path}/raw/top_cryptocurrencies.csv"
         
         try:
-            df = pd.read_csv(file_path)
+            df = self.csv_manager.read_csv(file_path, stage='filter3')
             cryptocurrencies = df.to_dict('records')
             return cryptocurrencies
             
         except Exception as e:
             return []
     
+    def uses_database(self, crypto_id: str) -> bool:
+        database = self.csv_manager.database
+        return database is not None and database.has_history(crypto_id)
+    
     def check_data_gaps(self, crypto_id: str) -> List[Dict]:
         file_path = f"{self.base_path}/historical/{crypto_id}.csv"
         
-        if not os.path.exists(file_path):
+        if not self.uses_database(crypto_id) and not os.path.exists(file_path):
             return self.generate_10_year_date_range() 
         
         try:
-            df = pd.read_csv(file_path)
+            if self.uses_database(crypto_id):
+                df = pd.DataFrame({'date': self.csv_manager.database.history_dates(crypto_id)})
+            else:
+                df = self.csv_manager.read_csv(file_path, stage='filter3', crypto_id=crypto_id)
             
             if df.empty or 'date' not in df.columns:
                 return self.generate_10_year_date_range()
@@ -57,6 +67,7 @@ class Filter3:
             return missing_data
             
         except Exception as e:
+            metrics.error('filter3', e, coin=crypto_id)
             return self.generate_10_year_date_range()
 
     def generate_10_year_date_range(self) -> List[Dict]:
@@ -71,11 +82,24 @@ class Filter3:
     def format_and_clean_data(self, crypto_id: str) -> bool:
         file_path = f"{self.base_path}/historical/{crypto_id}.csv"
         
+        if self.uses_database(crypto_id):
+            # Dates are unique and sorted by the primary key already.
+            try:
+                dropped = self.csv_manager.database.delete_invalid_prices(crypto_id)
+                metrics.inc('rows_dropped_total', dropped, stage='filter3', coin=crypto_id)
+                self.csv_manager.export_history_csv(crypto_id)
+                if dropped:
+                    self.csv_manager.update_indicators(crypto_id, self.csv_manager.database.history(crypto_id), rebuild=True)
+                return True
+            except Exception as e:
+                metrics.error('filter3', e, coin=crypto_id)
+                return False
+        
         if not os.path.exists(file_path):
             return False
         
         try:
-            df = pd.read_csv(file_path)
+            df = self.csv_manager.read_csv(file_path, stage='filter3', crypto_id=crypto_id)
             
             if df.empty:
                 return False
@@ -101,21 +125,28 @@ class Filter3:
             df = df[df[price_column] > 0] 
             cleaned_count = len(df)
             
-            df.to_csv(file_path, index=False)
+            metrics.inc('rows_dropped_total', initial_count - cleaned_count, stage='filter3', coin=crypto_id)
+            
+            self.csv_manager.write_csv(df, file_path, stage='filter3', crypto_id=crypto_id)
+            self.csv_manager.update_indicators(crypto_id, df.to_dict('records'), rebuild=True)
             
             return True
             
         except Exception as e:
+            metrics.error('filter3', e, coin=crypto_id)
             return False
     
     def calculate_statistics(self, crypto_id: str) -> Dict:
         file_path = f"{self.base_path}/historical/{crypto_id}.csv"
         
+        if self.uses_database(crypto_id):
+            return self.csv_manager.database.statistics(crypto_id)
+        
         if not os.path.exists(file_path):
             return {}
         
         try:
-            df = pd.read_csv(file_path)
+            df = self.csv_manager.read_csv(file_path, stage='filter3', crypto_id=crypto_id)
             
             if df.empty:
                 return {}
@@ -144,8 +175,28 @@ class Filter3:
             return stats
             
         except Exception as e:
+            metrics.error('filter3', e, coin=crypto_id)
             return {}
     
+    def build_rollups(self, crypto_id: str) -> int:
+        """Weekly/monthly rollups and chart tiles from the cleaned history; returns the number of tiles."""
+        file_path = f"{self.base_path}/historical/{crypto_id}.csv"
+        
+        try:
+            if self.uses_database(crypto_id):
+                rows = self.csv_manager.database.history(crypto_id)
+            elif os.path.exists(file_path):
+                rows = self.csv_manager.read_csv(file_path, stage='filter3', crypto_id=crypto_id).to_dict('records')
+            else:
+                return 0
+            
+            stored = self.rollup_store.build(crypto_id, rows)
+            return sum(len(tiles) for tiles in stored['resolutions'].values()) if stored else 0
+            
+        except Exception as e:
+            metrics.error('filter3', e, coin=crypto_id)
+            return 0
+    
     def process_cryptocurrency(self, crypto: Dict) -> Dict:
         crypto_id = crypto['id']
         crypto_name = crypto['name']
@@ -158,12 +209,15 @@ class Filter3:
         
         stats = self.calculate_statistics(crypto_id)
         
+        rollup_tiles = self.build_rollups(crypto_id) if formatting_success else 0
+        
         result = {
             'crypto_id': crypto_id,
             'crypto_name': crypto_name,
             'missing_dates_found': len(missing_dates),
             'missing_dates_filled': len(filled_data),
             'formatting_success': formatting_success,
+            'rollup_tiles': rollup_tiles,
             'statistics': stats
         }
         
@@ -181,6 +235,7 @@ class Filter3:
                 'Missing Dates Found': result['missing_dates_found'],
                 'Missing Dates Filled': result['missing_dates_filled'],
                 'Formatting Success': result['formatting_success'],
+                'Rollup Tiles': result['rollup_tiles'],
                 'Total Records': result['statistics'].get('total_records', 0),
                 'Data Quality': result['statistics'].get('data_quality', 'UNKNOWN')
             })
@@ -189,7 +244,7 @@ class Filter3:
         
         os.makedirs(f"{self.base_path}/processed", exist_ok=True)
         report_path = f"{self.base_path}/processed/filter3_report.csv"
-        df.to_csv(report_path, index=False)
+        self.csv_manager.write_csv(df, report_path, stage='filter3')
         
         total_cryptos = len(self.results)
         total_filled = sum(r['missing_dates_filled'] for r in self.results)
@@ -208,7 +263,9 @@ class Filter3:
             cryptocurrencies = cryptocurrencies[:3]
         
         for crypto in cryptocurrencies:
-            result = self.process_cryptocurrency(crypto)
+            with metrics.span('filter3.crypto', coin=crypto['id']):
+                result = self.process_cryptocurrency(crypto)
+            metrics.inc('cryptos_total', stage='filter3', status='OK' if result['formatting_success'] else 'FAILED')
             self.results.append(result)
         
         report_summary = self.create_final_report()
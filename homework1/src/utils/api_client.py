@@ -1,16 +1,18 @@
-import yfinance as yf
 import pandas as pd
 import requests
-import time
 from typing import List, Dict
+from src.utils.http_cache import HTTPCache, CachedSession, CachedYahooHistory
 
 class CoinGeckoClient:
     
     BASE_URL = "https://api.coingecko.com/api/v3"
     
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, cache: HTTPCache = None):
         self.request_delay = 1
+        self.cache = cache or HTTPCache()
+        # Only requests that reach CoinGecko wait request_delay; cache hits don't.
+        self.session = CachedSession(self.cache, min_interval=self.request_delay)
+        self.yahoo = CachedYahooHistory(self.cache)
     
     def get_top_cryptocurrencies(self, limit: int = 100) -> List[Dict]:
         
@@ -23,8 +25,6 @@ class CoinGeckoClient:
             'sparkline': False
         }
         
-        time.sleep(self.request_delay)
-        
         try:
             response = self.session.get(url, params=params)
             response.raise_for_status()  
@@ -39,8 +39,7 @@ class CoinGeckoClient:
         try:
             yahoo_symbol = f"{symbol.upper()}-USD"
             
-            ticker = yf.Ticker(yahoo_symbol)
-            hist_data = ticker.history(period=f"{years}y")
+            hist_data = self.yahoo.history(yahoo_symbol, period=f"{years}y")
             
             if hist_data.empty:
                 return []
@@ -0,0 +1,285 @@
+import itertools
+import math
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional
+from src.utils.metrics import metrics
+
+TRADING_DAYS = 365  # crypto trades every day
+
+# Default parameters match the periods used in homework2/scripts/analysis.js
+STRATEGIES = {
+    'sma_crossover': {'fast': 20, 'slow': 50},
+    'ema_crossover': {'fast': 12, 'slow': 26},
+    'rsi_bands': {'period': 14, 'lower': 30, 'upper': 70},
+    'macd': {'fast': 12, 'slow': 26, 'signal': 9},
+    'bollinger': {'period': 20, 'width': 2.0},
+}
+
+# Parameters that are window lengths in days
+PERIOD_PARAMS = ('fast', 'slow', 'signal', 'period')
+
+# Most parameter combinations one API sweep request may simulate (before the fast < slow filter)
+MAX_SWEEP_COMBINATIONS = 500
+
+
+def parse_param(name: str, value: str):
+    """Strict query-string parsing: periods are positive ints, everything else a finite float."""
+    if name in PERIOD_PARAMS:
+        period = int(value)
+        if period < 1:
+            raise ValueError(f"{name} must be a positive integer")
+        return period
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be a finite number")
+    return number
+
+
+def grid_size(grid: Dict[str, List]) -> int:
+    return math.prod(len(values) for values in grid.values())
+
+
+class IndicatorCache:
+    """Indicator arrays for one close series, computed once per window."""
+
+    def __init__(self, close: np.ndarray):
+        self.close = close
+        self.series = pd.Series(close)
+        self.cache = {}
+
+    def get(self, key, compute):
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return self.cache[key]
+
+    def sma(self, period: int) -> np.ndarray:
+        def compute():
+            csum = np.cumsum(np.insert(self.close, 0, 0.0))
+            out = np.full(self.close.size, np.nan)
+            if self.close.size >= period:
+                out[period - 1:] = (csum[period:] - csum[:-period]) / period
+            return out
+        return self.get(('sma', period), compute)
+
+    def ema(self, period: int, values: np.ndarray = None, key=None) -> np.ndarray:
+        values = self.close if values is None else values
+
+        def compute():
+            # Seeded with the SMA of the first `period` valid values, like analysis.js
+            out = np.full(values.size, np.nan)
+            valid = np.flatnonzero(~np.isnan(values))
+            if valid.size < period:
+                return out
+            start = valid[0]
+            seed_at = start + period - 1
+            seeded = values[seed_at:].copy()
+            seeded[0] = values[start:seed_at + 1].mean()
+            out[seed_at:] = pd.Series(seeded).ewm(span=period, adjust=False).mean().to_numpy()
+            return out
+        return self.get(key or ('ema', period), compute)
+
+    def rolling_std(self, period: int) -> np.ndarray:
+        return self.get(('std', period), lambda: self.series.rolling(period).std(ddof=0).to_numpy())
+
+    def rsi(self, period: int) -> np.ndarray:
+        def compute():
+            # Like indicators.py and calculateRSI in analysis.js, the RSI of day t
+            # averages the `period` changes before it, not day t's own change.
+            changes = np.diff(self.close, prepend=np.nan)
+            gains = pd.Series(np.where(changes > 0, changes, 0.0)).rolling(period).sum().shift(1).to_numpy() / period
+            losses = pd.Series(np.where(changes < 0, -changes, 0.0)).rolling(period).sum().shift(1).to_numpy() / period
+            gains[:period + 1] = np.nan
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = 100 - 100 / (1 + gains / losses)
+            rsi[(losses == 0) & ~np.isnan(gains)] = 100.0
+            return rsi
+        return self.get(('rsi', period), compute)
+
+    def macd(self, fast: int, slow: int, signal: int):
+        def compute():
+            line = self.ema(fast) - self.ema(slow)
+            signal_line = self.ema(signal, values=line, key=('macd_signal', fast, slow, signal))
+            return line, signal_line
+        return self.get(('macd', fast, slow, signal), compute)
+
+
+def hold_between(enter: np.ndarray, exit_: np.ndarray) -> np.ndarray:
+    """Long from an enter signal until the next exit signal, without a Python loop."""
+    state = np.full(enter.size, np.nan)
+    state[exit_] = 0.0
+    state[enter] = 1.0
+    return pd.Series(state).ffill().fillna(0.0).to_numpy()
+
+
+def positions(indicators: IndicatorCache, strategy: str, params: Dict) -> np.ndarray:
+    """Target position (0 = flat, 1 = long) decided at each day's close."""
+    close = indicators.close
+    for name in PERIOD_PARAMS:
+        if name in params and int(params[name]) < 1:
+            raise ValueError(f"{name} must be a positive integer")
+
+    if strategy == 'sma_crossover':
+        fast, slow = indicators.sma(int(params['fast'])), indicators.sma(int(params['slow']))
+        return np.where(fast > slow, 1.0, 0.0)
+
+    if strategy == 'ema_crossover':
+        fast, slow = indicators.ema(int(params['fast'])), indicators.ema(int(params['slow']))
+        return np.where(fast > slow, 1.0, 0.0)
+
+    if strategy == 'rsi_bands':
+        rsi = indicators.rsi(int(params['period']))
+        return hold_between(rsi < params['lower'], rsi > params['upper'])
+
+    if strategy == 'macd':
+        line, signal_line = indicators.macd(int(params['fast']), int(params['slow']), int(params['signal']))
+        return np.where(line > signal_line, 1.0, 0.0)
+
+    if strategy == 'bollinger':
+        period = int(params['period'])
+        middle = indicators.sma(period)
+        lower = middle - params['width'] * indicators.rolling_std(period)
+        return hold_between(close < lower, close > middle)
+
+    raise ValueError(f"Unknown strategy: {strategy}")
+
+
+def simulate(close: np.ndarray, position_matrix: np.ndarray, fee: float = 0.001, slippage: float = 0.0005) -> Dict:
+    """
+    Vectorized P&L for one or many position series over the same closes.
+
+    `position_matrix` is (n_params, n_days). A position taken at the close of
+    day t earns the return of day t+1; every change in position pays
+    fee + slippage on the traded fraction.
+    """
+    position_matrix = np.atleast_2d(position_matrix)
+    returns = np.zeros(close.size)
+    returns[1:] = close[1:] / close[:-1] - 1
+
+    held = np.zeros_like(position_matrix)
+    held[:, 1:] = position_matrix[:, :-1]
+    turnover = np.abs(np.diff(position_matrix, axis=1, prepend=0.0))
+
+    strategy_returns = held * returns - turnover * (fee + slippage)
+    equity = np.cumprod(1 + strategy_returns, axis=1)
+
+    return {
+        'returns': strategy_returns,
+        'equity': equity,
+        'turnover': turnover,
+        'held': held,
+    }
+
+
+def summary_stats(close: np.ndarray, result: Dict) -> List[Dict]:
+    strategy_returns, equity = result['returns'], result['equity']
+    days = strategy_returns.shape[1]
+    years = max(days / TRADING_DAYS, 1e-9)
+
+    final = equity[:, -1]
+    mean = strategy_returns.mean(axis=1)
+    std = strategy_returns.std(axis=1)
+    running_max = np.maximum.accumulate(equity, axis=1)
+    max_drawdown = (equity / running_max - 1).min(axis=1)
+    trades = (result['turnover'] > 0).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS), 0.0)
+        cagr = np.where(final > 0, final ** (1 / years) - 1, -1.0)
+
+    buy_and_hold = close[-1] / close[0] - 1 if close.size else 0.0
+
+    return [
+        {
+            'total_return': float(final[i] - 1),
+            'cagr': float(cagr[i]),
+            'annual_volatility': float(std[i] * np.sqrt(TRADING_DAYS)),
+            'sharpe': float(sharpe[i]),
+            'max_drawdown': float(max_drawdown[i]),
+            'trades': int(trades[i]),
+            'exposure': float(result['held'][i].mean()),
+            'buy_and_hold_return': float(buy_and_hold),
+        }
+        for i in range(final.size)
+    ]
+
+
+def load_prices(crypto_id: str, base_path: str = "data", database=None,
+                start: str = None, end: str = None) -> pd.DataFrame:
+    if database is not None and database.has_history(crypto_id):
+        df = pd.DataFrame(database.history(crypto_id, start, end))
+    else:
+        file_path = f"{base_path}/historical/{crypto_id}.csv"
+        if not os.path.exists(file_path):
+            return pd.DataFrame(columns=['date', 'close'])
+        df = pd.read_csv(file_path)
+        if start:
+            df = df[df['date'] >= start]
+        if end:
+            df = df[df['date'] <= end]
+
+    price_column = 'close' if 'close' in df.columns else 'price'
+    df = df[['date', price_column]].rename(columns={price_column: 'close'})
+    df = df[df['close'] > 0].drop_duplicates(subset=['date'], keep='last').sort_values('date')
+    return df.reset_index(drop=True)
+
+
+def backtest(prices: pd.DataFrame, strategy: str, params: Dict = None,
+             fee: float = 0.001, slippage: float = 0.0005, include_equity: bool = True) -> Dict:
+    params = dict(STRATEGIES[strategy], **(params or {})) if strategy in STRATEGIES else params
+    close = prices['close'].to_numpy(dtype=float)
+
+    with metrics.timer('backtest_seconds', strategy=strategy):
+        result = simulate(close, positions(IndicatorCache(close), strategy, params), fee, slippage)
+        stats = summary_stats(close, result)[0]
+
+    output = {'strategy': strategy, 'params': params, 'fee': fee, 'slippage': slippage, 'stats': stats}
+    if include_equity:
+        output['equity_curve'] = [
+            {'date': d, 'equity': float(e)} for d, e in zip(prices['date'], result['equity'][0])
+        ]
+    return output
+
+
+def parameter_grid(grid: Dict[str, List]) -> List[Dict]:
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    # Crossovers only make sense with fast < slow.
+    return [c for c in combos if not ('fast' in c and 'slow' in c and c['fast'] >= c['slow'])]
+
+
+def sweep(prices: pd.DataFrame, strategy: str, grid: Dict[str, List],
+          fee: float = 0.001, slippage: float = 0.0005) -> List[Dict]:
+    """All parameter combinations for one coin, simulated as one (n_params, n_days) matrix."""
+    close = prices['close'].to_numpy(dtype=float)
+    combos = parameter_grid(grid)
+    if close.size < 2 or not combos:
+        return []
+
+    indicators = IndicatorCache(close)
+    matrix = np.vstack([positions(indicators, strategy, dict(STRATEGIES.get(strategy, {}), **c)) for c in combos])
+    stats = summary_stats(close, simulate(close, matrix, fee, slippage))
+    return [{'params': c, 'stats': s} for c, s in zip(combos, stats)]
+
+
+def sweep_coin(args) -> Dict:
+    crypto_id, strategy, grid, fee, slippage, base_path = args
+    prices = load_prices(crypto_id, base_path)
+    results = sweep(prices, strategy, grid, fee, slippage)
+    best = max(results, key=lambda r: r['stats']['sharpe']) if results else None
+    return {'crypto_id': crypto_id, 'days': len(prices), 'results': results, 'best': best}
+
+
+def sweep_universe(crypto_ids: List[str], strategy: str, grid: Dict[str, List],
+                   fee: float = 0.001, slippage: float = 0.0005, base_path: str = "data",
+                   workers: Optional[int] = None) -> List[Dict]:
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    tasks = [(crypto_id, strategy, grid, fee, slippage, base_path) for crypto_id in crypto_ids]
+
+    with metrics.span('backtest.sweep_universe', strategy=strategy, coins=len(crypto_ids)):
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(sweep_coin, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+        return [sweep_coin(task) for task in tasks]
@@ -0,0 +1,270 @@
+import sys
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping
+from typing import List, Dict, Optional, Iterable
+
+MAX_EXACT_INT = 2 ** 53
+
+
+def is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Column:
+    """
+    One field of the coin list in the most compact form that round-trips:
+
+    - num:  array('d'), NaN for missing; ints come back as ints when the field had only ints
+    - dict: array('i') codes into a list of interned strings (repeated values)
+    - text: one UTF-8 blob plus offsets (mostly unique strings: ids, image URLs, ISO timestamps)
+    - object: plain list, for anything else
+    """
+
+    __slots__ = ('kind', 'data', 'offsets', 'values', 'integral', 'nulls')
+
+    def __init__(self, kind: str, data=None, offsets=None, values=None, integral=False, nulls=None):
+        self.kind = kind
+        self.data = data
+        self.offsets = offsets
+        self.values = values
+        self.integral = integral
+        self.nulls = nulls
+
+    @classmethod
+    def encode(cls, raw: List) -> 'Column':
+        present = [v for v in raw if v is not None]
+
+        if all(is_number(v) for v in present):
+            integral = bool(present) and all(isinstance(v, int) for v in present)
+            if not integral or all(abs(v) < MAX_EXACT_INT for v in present):
+                return cls('num', array('d', [float('nan') if v is None else v for v in raw]), integral=integral)
+
+        if all(isinstance(v, str) for v in present):
+            if len(set(present)) * 2 <= len(raw):
+                values = []
+                codes = {}
+                data = array('i')
+                for v in raw:
+                    if v is None:
+                        data.append(-1)
+                        continue
+                    if v not in codes:
+                        codes[v] = len(values)
+                        values.append(sys.intern(v))
+                    data.append(codes[v])
+                return cls('dict', data, values=values)
+
+            encoded = [b'' if v is None else v.encode('utf-8') for v in raw]
+            offsets = array('q', [0])
+            for chunk in encoded:
+                offsets.append(offsets[-1] + len(chunk))
+            nulls = array('b', [v is None for v in raw]) if len(present) < len(raw) else None
+            return cls('text', b''.join(encoded), offsets=offsets, nulls=nulls)
+
+        return cls('object', values=list(raw))
+
+    def get(self, i: int):
+        kind = self.kind
+        if kind == 'num':
+            value = self.data[i]
+            if value != value:
+                return None
+            return int(value) if self.integral else value
+        if kind == 'text':
+            if self.nulls is not None and self.nulls[i]:
+                return None
+            return self.data[self.offsets[i]:self.offsets[i + 1]].decode('utf-8')
+        if kind == 'dict':
+            code = self.data[i]
+            return None if code < 0 else self.values[code]
+        return self.values[i]
+
+    def to_list(self) -> List:
+        """The whole column decoded at once; much cheaper than get() per cell."""
+        kind = self.kind
+        if kind == 'num':
+            if self.integral:
+                return [None if v != v else int(v) for v in self.data]
+            return [None if v != v else v for v in self.data]
+        if kind == 'text':
+            text = self.data.decode('utf-8')
+            offsets = self.offsets
+            if len(text) == len(self.data):
+                # ASCII: byte offsets are character offsets
+                values = [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+            else:
+                values = [self.data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+            if self.nulls is not None:
+                values = [None if null else v for v, null in zip(values, self.nulls)]
+            return values
+        if kind == 'dict':
+            values = self.values
+            return [None if code < 0 else values[code] for code in self.data]
+        return list(self.values)
+
+    def nbytes(self) -> int:
+        size = 0
+        for part in (self.data, self.offsets, self.nulls):
+            if part is not None:
+                size += len(part) * getattr(part, 'itemsize', 1)
+        if self.values is not None:
+            size += sum(sys.getsizeof(v) for v in self.values) + sys.getsizeof(self.values)
+        return size
+
+
+class CoinRecord(Mapping):
+    """Read-only view of one row; behaves like the dict it replaces."""
+
+    __slots__ = ('table', 'position')
+
+    def __init__(self, table: 'CoinTable', position: int):
+        self.table = table
+        self.position = position
+
+    def __getitem__(self, field: str):
+        column = self.table.columns.get(field)
+        if column is None:
+            raise KeyError(field)
+        return column.get(self.position)
+
+    def __iter__(self):
+        return iter(self.table.fields)
+
+    def __len__(self):
+        return len(self.table.fields)
+
+    def to_dict(self) -> Dict:
+        return {field: column.get(self.position) for field, column in self.table.columns.items()}
+
+
+class CoinTable:
+    """
+    The coin list as columns instead of one dict per coin.
+
+    Pickles without numpy (stdlib arrays), so the API starts as fast as
+    before; vectorized filtering and sorting import numpy on first use and
+    work on zero-copy views of the same buffers.
+    """
+
+    def __init__(self, fields: List[str], columns: Dict[str, Column], size: int):
+        self.fields = fields
+        self.columns = columns
+        self.size = size
+        self.index = {crypto_id: i for i, crypto_id in enumerate(self.values('id'))} if 'id' in columns else {}
+        # Lowercased search text per field set, built on the first search
+        self.search_texts = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping]) -> 'CoinTable':
+        records = list(records)
+        fields = []
+        for record in records:
+            for field in record:
+                if field not in fields:
+                    fields.append(field)
+        columns = {field: Column.encode([record.get(field) for record in records]) for field in fields}
+        return cls(fields, columns, len(records))
+
+    def __getstate__(self):
+        # The id index is rebuilt on load instead of being pickled twice.
+        return {'fields': self.fields, 'columns': self.columns, 'size': self.size}
+
+    def __setstate__(self, state):
+        self.__init__(state['fields'], state['columns'], state['size'])
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return (CoinRecord(self, i) for i in range(self.size))
+
+    def __getitem__(self, position: int) -> CoinRecord:
+        if not -self.size <= position < self.size:
+            raise IndexError(position)
+        return CoinRecord(self, position % self.size)
+
+    def get(self, crypto_id: str) -> Optional[CoinRecord]:
+        position = self.index.get(crypto_id)
+        return None if position is None else CoinRecord(self, position)
+
+    def values(self, field: str) -> List:
+        return self.columns[field].to_list()
+
+    def records(self, positions: Iterable[int] = None) -> List[Dict]:
+        """Plain dicts for JSON responses."""
+        fields = list(self.columns)
+        if positions is None:
+            rows = zip(*(column.to_list() for column in self.columns.values()))
+            return [dict(zip(fields, row)) for row in rows]
+
+        positions = list(positions)
+        if len(positions) * 4 < self.size:
+            columns = list(self.columns.values())
+            return [dict(zip(fields, [column.get(i) for column in columns])) for i in positions]
+        decoded = [column.to_list() for column in self.columns.values()]
+        return [dict(zip(fields, [values[i] for values in decoded])) for i in positions]
+
+    def nbytes(self) -> int:
+        return sum(column.nbytes() for column in self.columns.values())
+
+    # Vectorized access
+
+    def numeric(self, field: str):
+        """Zero-copy float64 numpy view of a numeric column."""
+        import numpy as np
+
+        column = self.columns[field]
+        if column.kind != 'num':
+            raise ValueError(f"{field} is not a numeric column")
+        return np.frombuffer(column.data, dtype=np.float64)
+
+    def query(self, sort: str = None, descending: bool = False, limit: int = None,
+              ranges: Dict[str, tuple] = None) -> List[int]:
+        """Positions matching every (low, high) range, sorted by one column (missing values last)."""
+        import numpy as np
+
+        mask = np.ones(self.size, dtype=bool)
+        for field, (low, high) in (ranges or {}).items():
+            values = self.numeric(field)
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+
+        positions = np.flatnonzero(mask)
+        if sort:
+            keys = self.numeric(sort)[positions]
+            positions = positions[np.argsort(-keys if descending else keys, kind='stable')]
+        if limit is not None:
+            positions = positions[:limit]
+        return positions.tolist()
+
+    def search_text(self, fields) -> tuple:
+        """One lowercased string for all rows ("name\tsymbol\n" per row) and the offset each row starts at."""
+        cached = self.search_texts.get(fields)
+        if cached is None:
+            columns = [[str(v or '').lower() for v in self.values(f)] for f in fields if f in self.columns]
+            rows = ['\t'.join(row) + '\n' for row in zip(*columns)]
+            starts, offset = array('q'), 0
+            for row in rows:
+                starts.append(offset)
+                offset += len(row)
+            cached = self.search_texts[fields] = (''.join(rows), starts)
+        return cached
+
+    def search(self, query: str, fields=('name', 'symbol')) -> List[int]:
+        query = query.lower()
+        if not query:
+            return list(range(self.size))
+        if '\t' in query or '\n' in query:
+            return []
+        text, starts = self.search_text(tuple(fields))
+        positions = []
+        found = text.find(query)
+        while found != -1:
+            row = bisect_right(starts, found) - 1
+            positions.append(row)
+            # One hit per row: continue from the next row
+            found = text.find(query, starts[row + 1]) if row + 1 < len(starts) else -1
+        return positions
@@ -1,12 +1,49 @@
+import csv
 import pandas as pd
 import os
 from typing import List, Dict, Optional
 from datetime import datetime
+from src.utils.metrics import metrics
+from src.utils.startup_snapshot import write_snapshot
+from src.utils.indicators import IndicatorStore
+from src.utils.sql_store import SQLStore
+from src.utils.snapshot_archive import SnapshotArchive
+
+def read_header_and_last_line(file_path: str):
+    """Column names and (byte offset, bytes) of the file's last data line, without reading the rest."""
+    with open(file_path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode()]))
+        header_end = f.tell()
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        start = max(header_end, end - 4096)
+        while True:
+            f.seek(start)
+            chunk = f.read(end - start)
+            newline = chunk.rstrip(b'\r\n').rfind(b'\n')
+            if newline != -1 or start == header_end:
+                break
+            start = max(header_end, start - 4096)
+        offset = start + newline + 1
+        line = chunk[newline + 1:]
+    if not line.strip():
+        return header, None
+    if not line.endswith(b'\n'):
+        # Appending right after an unterminated line would glue two rows together
+        return header, None
+    return header, (offset, line.rstrip(b'\r\n'))
+
 
 class CSVManager:
-    def __init__(self, base_path: str = "data"):
+    def __init__(self, base_path: str = "data", database_path: str = None):
         self.base_path = base_path
         self.ensure_directories()
+        self.indicator_store = IndicatorStore(base_path)
+        self.archive = SnapshotArchive(base_path)
+        
+        # Optional SQLite backend, e.g. CRYPTO_DB=data/crypto.db
+        database_path = database_path or os.environ.get('CRYPTO_DB')
+        self.database = SQLStore(database_path) if database_path else None
     
     def ensure_directories(self):
         os.makedirs(f"{self.base_path}/raw", exist_ok=True)
@@ -20,17 +57,50 @@ class CSVManager:
         df = pd.DataFrame(cryptocurrencies)
         
         file_path = f"{self.base_path}/raw/top_cryptocurrencies.csv"
-        df.to_csv(file_path, index=False)
+        self.write_csv(df, file_path, stage='filter1')
+        
+        # Precomputed coin list for a fast API cold start (see homework2/app.py).
+        # Best effort: without it the API rebuilds the list from the CSV.
+        try:
+            with metrics.timer('write_seconds', stage='snapshot'):
+                write_snapshot(file_path, f"{self.base_path}/processed/startup_snapshot.pkl")
+        except Exception as e:
+            metrics.error('snapshot', e)
+            print(f"⚠️ Снимката за брз старт не е запишана ({e}); API-то ќе ја чита листата од CSV")
+        
+        # Every run is kept, so the list can be reconstructed for any past time
+        try:
+            self.archive.append(cryptocurrencies)
+        except Exception as e:
+            metrics.error('archive', e)
+        
+        if self.database:
+            self.database.upsert_coins(cryptocurrencies)
+    
+    def write_csv(self, df: pd.DataFrame, file_path: str, stage: str, crypto_id: str = None):
+        with metrics.timer('write_seconds', stage=stage, coin=crypto_id):
+            df.to_csv(file_path, index=False)
+        metrics.inc('bytes_written_total', os.path.getsize(file_path), stage=stage, coin=crypto_id)
+        metrics.inc('rows_written_total', len(df), stage=stage, coin=crypto_id)
+    
+    def read_csv(self, file_path: str, stage: str, crypto_id: str = None) -> pd.DataFrame:
+        with metrics.timer('parse_seconds', stage=stage, coin=crypto_id):
+            df = pd.read_csv(file_path)
+        metrics.inc('bytes_read_total', os.path.getsize(file_path), stage=stage, coin=crypto_id)
+        return df
     
     def get_last_date_for_crypto(self, crypto_id: str) -> Optional[str]:
 
+        if self.database and self.database.has_history(crypto_id):
+            return self.database.last_date(crypto_id)
+        
         file_path = f"{self.base_path}/historical/{crypto_id}.csv"
         
         if not os.path.exists(file_path):
             return None 
         
         try:
-            df = pd.read_csv(file_path)
+            df = self.read_csv(file_path, stage='storage', crypto_id=crypto_id)
             if df.empty or 'date' not in df.columns:
                 return None
             
@@ -38,6 +108,7 @@ class CSVManager:
             return last_date
             
         except Exception as e:
+            metrics.error('storage', e, coin=crypto_id)
             return None
     
     def save_historical_data(self, crypto_id: str, historical_data: List[Dict]):
@@ -47,7 +118,60 @@ class CSVManager:
         df = pd.DataFrame(historical_data)
         
         file_path = f"{self.base_path}/historical/{crypto_id}.csv"
-        df.to_csv(file_path, index=False)
+        self.write_csv(df, file_path, stage='storage', crypto_id=crypto_id)
+        
+        if self.database:
+            self.database.upsert_history(crypto_id, historical_data, replace=True)
+        
+        self.update_indicators(crypto_id, historical_data, rebuild=True)
+    
+    def export_history_csv(self, crypto_id: str):
+        """Rewrites data/historical/<id>.csv from the database."""
+        file_path = f"{self.base_path}/historical/{crypto_id}.csv"
+        self.write_csv(pd.DataFrame(self.database.history(crypto_id)), file_path, stage='storage', crypto_id=crypto_id)
+    
+    def sync_csv_from_database(self, crypto_id: str, new_data: List[Dict], previous_last_date: Optional[str]):
+        # The CSV stays the file every other reader uses (quality audit,
+        # backtests, rollups), so it follows the database on every append.
+        file_path = f"{self.base_path}/historical/{crypto_id}.csv"
+        first_new_date = min(str(row['date'])[:10] for row in new_data if row.get('date') is not None)
+        
+        last_line = None
+        if os.path.exists(file_path) and previous_last_date is not None and first_new_date >= previous_last_date:
+            header, last_line = read_header_and_last_line(file_path)
+            if last_line is not None and first_new_date == previous_last_date:
+                # Incremental fetches start at the last stored day, which may come back revised
+                last_row = next(csv.reader([last_line[1].decode()]))
+                if dict(zip(header, last_row)).get('date', '')[:10] != previous_last_date:
+                    last_line = None
+        
+        if last_line is None:
+            # Backfilled days, or a file out of step: only a full rewrite keeps it sorted and unique
+            self.export_history_csv(crypto_id)
+            return
+        
+        # Only the tail changed: replace the revised last day, if any, and append the rest
+        new_df = pd.DataFrame(self.database.history(crypto_id, start=first_new_date))
+        if 'price' in header:
+            new_df['price'] = new_df['price'].fillna(new_df['close'])
+        new_df = new_df.reindex(columns=header)
+        
+        with metrics.timer('write_seconds', stage='storage', coin=crypto_id):
+            with open(file_path, 'r+b') as f:
+                if first_new_date == previous_last_date:
+                    f.truncate(last_line[0])
+                f.seek(0, os.SEEK_END)
+                f.write(new_df.to_csv(header=False, index=False).encode())
+        metrics.inc('rows_written_total', len(new_df), stage='storage', coin=crypto_id)
+    
+    def update_indicators(self, crypto_id: str, rows: List[Dict], rebuild: bool = False, all_rows_loader=None):
+        try:
+            if rebuild:
+                self.indicator_store.rebuild(crypto_id, rows)
+            else:
+                self.indicator_store.append(crypto_id, rows, all_rows_loader)
+        except Exception as e:
+            metrics.error('indicators', e, coin=crypto_id)
     
     def append_historical_data(self, crypto_id: str, new_data: List[Dict]):
         if not new_data:
@@ -55,18 +179,31 @@ class CSVManager:
         
         file_path = f"{self.base_path}/historical/{crypto_id}.csv"
         
+        if self.database and self.database.has_history(crypto_id):
+            # One upsert transaction instead of re-reading and rewriting the CSV.
+            try:
+                previous_last_date = self.database.last_date(crypto_id)
+                self.database.upsert_history(crypto_id, new_data)
+                self.sync_csv_from_database(crypto_id, new_data, previous_last_date)
+                self.update_indicators(crypto_id, new_data, all_rows_loader=lambda: self.database.history(crypto_id))
+            except Exception as e:
+                metrics.error('database', e, coin=crypto_id)
+            return
+        
         if not os.path.exists(file_path):
             self.save_historical_data(crypto_id, new_data)
             return
         
         try:
-            existing_df = pd.read_csv(file_path)
+            existing_df = self.read_csv(file_path, stage='storage', crypto_id=crypto_id)
             
             new_df = pd.DataFrame(new_data)
             
-            combined_df = pd.concat([existing_df, new_df]).drop_duplicates(subset=['date']).sort_values('date')
+            combined_df = pd.concat([existing_df, new_df]).drop_duplicates(subset=['date'], keep='last').sort_values('date')
+            
+            self.write_csv(combined_df, file_path, stage='storage', crypto_id=crypto_id)
             
-            combined_df.to_csv(file_path, index=False)
+            self.update_indicators(crypto_id, new_data, all_rows_loader=lambda: combined_df.to_dict('records'))
             
         except Exception as e:
-            print("x")
+            metrics.error('storage', e, coin=crypto_id)
@@ -0,0 +1,309 @@
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import re
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+from src.utils.metrics import metrics
+
+# off:    always the network, nothing stored
+# normal: fresh entries from disk, stale ones revalidated (ETag / Last-Modified), network otherwise
+# record: always the network, every response stored
+# replay: disk only; a request that was never recorded raises CacheMiss
+MODES = ('off', 'normal', 'record', 'replay')
+
+# Seconds a response stays fresh, by host (Yahoo histories are keyed as yahoo://)
+DEFAULT_TTLS = {
+    'api.coingecko.com': 300,
+    'history': 3600,
+}
+
+# Headers that describe the transfer, not the (already decoded) body we store
+TRANSFER_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+class CacheMiss(requests.exceptions.RequestException):
+    """Replay mode and no recorded response for the request."""
+
+
+def normalize_request(method: str, url: str, params: Dict = None, body: bytes = None) -> str:
+    """Same request, same key: lowercase scheme/host, sorted query, booleans as true/false."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    for name, value in (params or {}).items():
+        if value is None:
+            continue
+        for item in value if isinstance(value, (list, tuple)) else [value]:
+            query.append((name, str(item)))
+    query = sorted((name, value.lower() if value in ('True', 'False') else value) for name, value in query)
+
+    key = f"{method.upper()} {parts.scheme.lower()}://{parts.netloc.lower()}{parts.path or '/'}"
+    if query:
+        key += f"?{urlencode(query)}"
+    if body:
+        body = body.encode() if isinstance(body, str) else body
+        key += f" body:{hashlib.sha256(body).hexdigest()}"
+    return key
+
+
+def max_age(headers) -> Optional[int]:
+    match = re.search(r'max-age=(\d+)', headers.get('Cache-Control', '') or '')
+    return int(match.group(1)) if match else None
+
+
+class HTTPCache:
+    """
+    Recorded upstream responses under data/cache/http, one entry per
+    normalized request: <hash>.json (status, headers, validators, age) and
+    <hash>.body.gz. Shared by the CoinGecko session and the Yahoo history calls.
+    """
+
+    def __init__(self, folder: str = "data/cache/http", mode: str = None,
+                 ttls: Dict[str, float] = None, default_ttl: float = 3600):
+        self.folder = folder
+        self.mode = mode or os.environ.get('CRYPTO_HTTP_CACHE', 'normal')
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown cache mode {self.mode}; expected one of {', '.join(MODES)}")
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+
+    def paths(self, key: str):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        folder = f"{self.folder}/{digest[:2]}"
+        return f"{folder}/{digest}.json", f"{folder}/{digest}.body.gz"
+
+    def load(self, key: str) -> Optional[Dict]:
+        meta_path, _ = self.paths(key)
+        try:
+            with open(meta_path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # A hash collision would be astronomically rare, but the key is cheap to check.
+        return entry if entry.get('key') == key else None
+
+    def body(self, key: str) -> bytes:
+        _, body_path = self.paths(key)
+        with open(body_path, 'rb') as f:
+            return gzip.decompress(f.read())
+
+    def ttl_for(self, key: str, headers=None) -> float:
+        host = urlsplit(key.split(' ', 1)[1]).netloc
+        if host in self.ttls:
+            return self.ttls[host]
+        upstream = max_age(headers) if headers is not None else None
+        return upstream if upstream is not None else self.default_ttl
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry['stored_at'] < entry['ttl']
+
+    def write_meta(self, entry: Dict):
+        meta_path, _ = self.paths(entry['key'])
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, meta_path)
+
+    def store(self, key: str, body: bytes, status: int = 200, headers: Dict = None, url: str = None) -> Dict:
+        meta_path, body_path = self.paths(key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+
+        headers = {k: v for k, v in (headers or {}).items() if k.lower() not in TRANSFER_HEADERS}
+        entry = {
+            'key': key,
+            'url': url,
+            'status': status,
+            'headers': headers,
+            'etag': headers.get('ETag') or headers.get('etag'),
+            'last_modified': headers.get('Last-Modified') or headers.get('last-modified'),
+            'stored_at': time.time(),
+            'ttl': self.ttl_for(key, CaseInsensitiveDict(headers)),
+            'size': len(body),
+        }
+
+        # Body first: a meta file always points at a complete body.
+        tmp_path = f"{body_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(body, compresslevel=1))
+        os.replace(tmp_path, body_path)
+        self.write_meta(entry)
+
+        metrics.inc('http_cache_total', result='stored')
+        metrics.inc('http_cache_bytes_stored_total', len(body))
+        return entry
+
+    def prune(self, max_age_days: float = 30) -> int:
+        """Drops entries not stored or revalidated for `max_age_days`. Recordings
+        (record/replay modes) are never pruned. Returns the number of entries removed."""
+        if self.mode != 'normal' or not os.path.isdir(self.folder):
+            return 0
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                meta_path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(meta_path) >= cutoff:
+                        continue
+                    os.remove(meta_path)
+                    body_path = f"{meta_path[:-len('.json')]}.body.gz"
+                    if os.path.exists(body_path):
+                        os.remove(body_path)
+                    removed += 1
+                except OSError:
+                    continue
+        metrics.inc('http_cache_total', removed, result='pruned')
+        return removed
+
+    def revalidated(self, entry: Dict, headers=None) -> Dict:
+        """A 304 Not Modified restarts the entry's TTL without rewriting the body."""
+        entry = dict(entry, stored_at=time.time())
+        if headers is not None:
+            entry['ttl'] = self.ttl_for(entry['key'], headers)
+        self.write_meta(entry)
+        return entry
+
+
+class CachedSession(requests.Session):
+    """
+    requests.Session that answers from HTTPCache when it can. Only requests
+    that actually go to the network are throttled to `min_interval`.
+    """
+
+    def __init__(self, cache: HTTPCache = None, min_interval: float = 0.0):
+        super().__init__()
+        self.cache = cache or HTTPCache()
+        self.min_interval = min_interval
+        self.last_network_call = 0.0
+        self.network_calls = 0
+
+    def network_send(self, request, **kwargs):
+        wait = self.min_interval - (time.monotonic() - self.last_network_call)
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            self.last_network_call = time.monotonic()
+            self.network_calls += 1
+
+    def cached_response(self, request, entry: Dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = self.cache.body(entry['key'])
+        response.url = entry['url'] or request.url
+        response.request = request
+        response.reason = 'OK'
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+    def send(self, request, **kwargs):
+        cache = self.cache
+        if cache.mode == 'off' or request.method not in ('GET', 'HEAD'):
+            return self.network_send(request, **kwargs)
+
+        key = normalize_request(request.method, request.url, body=request.body)
+        entry = cache.load(key)
+
+        if cache.mode == 'replay':
+            if entry is None:
+                metrics.inc('http_cache_total', result='replay_miss')
+                raise CacheMiss(f"No recorded response for {key}", request=request)
+            metrics.inc('http_cache_total', result='replay')
+            return self.cached_response(request, entry)
+
+        if entry is not None and cache.mode == 'normal':
+            if cache.is_fresh(entry):
+                metrics.inc('http_cache_total', result='hit')
+                return self.cached_response(request, entry)
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            response = self.network_send(request, **kwargs)
+        except requests.exceptions.RequestException:
+            if entry is None or cache.mode != 'normal':
+                raise
+            # Upstream unreachable: an old answer beats none (stale-if-error).
+            metrics.inc('http_cache_total', result='stale')
+            return self.cached_response(request, entry)
+
+        if response.status_code == 304 and entry is not None:
+            metrics.inc('http_cache_total', result='revalidated')
+            return self.cached_response(request, cache.revalidated(entry, response.headers))
+
+        metrics.inc('http_cache_total', result='miss')
+        if response.status_code == 200:
+            cache.store(key, response.content, response.status_code, dict(response.headers), response.url)
+        return response
+
+
+class CachedYahooHistory:
+    """
+    yf.Ticker(symbol).history(**params) through HTTPCache. yfinance brings its
+    own HTTP transport, so the recorded response is the resulting DataFrame
+    rather than the raw bytes; there are no validators to revalidate with.
+    """
+
+    def __init__(self, cache: HTTPCache = None, min_interval: float = 0.0):
+        self.cache = cache or HTTPCache()
+        self.min_interval = min_interval
+        self.last_network_call = 0.0
+        self.network_calls = 0
+
+    def download(self, symbol: str, params: Dict):
+        import yfinance as yf
+
+        wait = self.min_interval - (time.monotonic() - self.last_network_call)
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            return yf.Ticker(symbol).history(**params)
+        finally:
+            self.last_network_call = time.monotonic()
+            self.network_calls += 1
+
+    def history(self, symbol: str, refresh: bool = False, **params):
+        """`refresh=True` is for incremental updates that must see the latest candle:
+        it always goes to Yahoo (except in replay) and is only stored when recording."""
+        cache = self.cache
+        if cache.mode == 'off' or (refresh and cache.mode == 'normal'):
+            return self.download(symbol, params)
+
+        key = normalize_request('GET', f"yahoo://history/{symbol.upper()}", params)
+        entry = cache.load(key)
+
+        if cache.mode == 'replay':
+            if entry is None:
+                metrics.inc('http_cache_total', result='replay_miss')
+                raise CacheMiss(f"No recorded response for {key}")
+            metrics.inc('http_cache_total', result='replay')
+            return pickle.loads(cache.body(key))
+
+        if entry is not None and cache.mode == 'normal' and cache.is_fresh(entry):
+            metrics.inc('http_cache_total', result='hit')
+            return pickle.loads(cache.body(key))
+
+        try:
+            hist_data = self.download(symbol, params)
+        except Exception:
+            if entry is None or cache.mode != 'normal':
+                raise
+            metrics.inc('http_cache_total', result='stale')
+            return pickle.loads(cache.body(key))
+
+        metrics.inc('http_cache_total', result='miss')
+        # Empty results are recorded too: "no data for this symbol" is an answer worth replaying.
+        cache.store(key, pickle.dumps(hist_data, protocol=pickle.HIGHEST_PROTOCOL), url=key.split(' ', 1)[1])
+        return hist_data
@@ -0,0 +1,224 @@
+import copy
+import json
+import math
+import os
+from typing import List, Dict, Optional
+from src.utils.metrics import metrics
+
+# Same periods as homework2/scripts/analysis.js
+SMA_PERIOD = 20
+EMA_PERIODS = (12, 20, 26)
+RSI_PERIOD = 14
+MACD_SIGNAL_PERIOD = 9
+BOLLINGER_WIDTH = 2
+
+STATE_VERSION = 2
+
+
+def empty_state() -> Dict:
+    return {
+        'count': 0,
+        'last_date': None,
+        'close': None,
+        'window': [],
+        'changes': [],
+        'ema': {str(p): None for p in EMA_PERIODS},
+        'ema_seed': {str(p): 0.0 for p in EMA_PERIODS},
+        'macd_count': 0,
+        'macd_signal': None,
+        'macd_signal_seed': 0.0,
+    }
+
+
+def advance_ema(previous: Optional[float], seed_sum: float, count: int, period: int, value: float):
+    """One EMA step; like analysis.js, the first value is the SMA of the first `period` inputs."""
+    if count < period:
+        seed_sum += value
+        if count == period - 1:
+            return seed_sum / period, seed_sum
+        return None, seed_sum
+    multiplier = 2 / (period + 1)
+    return (value - previous) * multiplier + previous, seed_sum
+
+
+def advance(state: Dict, date: str, close: float) -> Dict:
+    """Moves the rolling state forward by one daily close, in place. O(window)."""
+    if state['close'] is not None:
+        state['changes'].append(close - state['close'])
+        # One extra change: like calculateRSI in analysis.js, the RSI of a day
+        # covers the RSI_PERIOD changes before it, not the day's own change.
+        if len(state['changes']) > RSI_PERIOD + 1:
+            state['changes'].pop(0)
+
+    state['window'].append(close)
+    if len(state['window']) > SMA_PERIOD:
+        state['window'].pop(0)
+
+    for period in EMA_PERIODS:
+        key = str(period)
+        state['ema'][key], state['ema_seed'][key] = advance_ema(
+            state['ema'][key], state['ema_seed'][key], state['count'], period, close
+        )
+
+    macd = macd_line(state)
+    if macd is not None:
+        state['macd_signal'], state['macd_signal_seed'] = advance_ema(
+            state['macd_signal'], state['macd_signal_seed'], state['macd_count'], MACD_SIGNAL_PERIOD, macd
+        )
+        state['macd_count'] += 1
+
+    state['count'] += 1
+    state['close'] = close
+    state['last_date'] = date
+    return state
+
+
+def macd_line(state: Dict) -> Optional[float]:
+    fast, slow = state['ema']['12'], state['ema']['26']
+    if fast is None or slow is None:
+        return None
+    return fast - slow
+
+
+def indicator_values(state: Dict) -> Dict:
+    values = {
+        'date': state['last_date'],
+        'close': state['close'],
+        'sma_20': None,
+        'ema_12': state['ema']['12'],
+        'ema_20': state['ema']['20'],
+        'ema_26': state['ema']['26'],
+        'macd': macd_line(state),
+        'macd_signal': state['macd_signal'],
+        'macd_histogram': None,
+        'rsi_14': None,
+        'bollinger_upper': None,
+        'bollinger_middle': None,
+        'bollinger_lower': None,
+    }
+
+    window = state['window']
+    if len(window) == SMA_PERIOD:
+        mean = sum(window) / SMA_PERIOD
+        std = math.sqrt(sum((p - mean) ** 2 for p in window) / SMA_PERIOD)
+        values.update({
+            'sma_20': mean,
+            'bollinger_middle': mean,
+            'bollinger_upper': mean + BOLLINGER_WIDTH * std,
+            'bollinger_lower': mean - BOLLINGER_WIDTH * std,
+        })
+
+    if values['macd'] is not None and values['macd_signal'] is not None:
+        values['macd_histogram'] = values['macd'] - values['macd_signal']
+
+    changes = state['changes'][:-1]
+    if len(changes) == RSI_PERIOD:
+        gains = sum(c for c in changes if c > 0) / RSI_PERIOD
+        losses = -sum(c for c in changes if c < 0) / RSI_PERIOD
+        values['rsi_14'] = 100.0 if losses == 0 else 100 - 100 / (1 + gains / losses)
+
+    return values
+
+
+class IndicatorStore:
+    """
+    Rolling indicator state per coin in data/indicators/<id>.json.
+
+    The state is kept as `base` (everything up to the second-to-last day) plus
+    the last row, because a refresh usually re-delivers today's still-moving
+    candle. Appends then cost O(new rows) instead of a pass over the history.
+    """
+
+    def __init__(self, base_path: str = "data"):
+        self.base_path = base_path
+        self.folder = f"{base_path}/indicators"
+        os.makedirs(self.folder, exist_ok=True)
+
+    def state_path(self, crypto_id: str) -> str:
+        return f"{self.folder}/{crypto_id}.json"
+
+    def load(self, crypto_id: str) -> Optional[Dict]:
+        path = self.state_path(crypto_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get('version') != STATE_VERSION:
+            return None
+        return stored
+
+    def save(self, crypto_id: str, base: Dict, last: Optional[Dict]):
+        latest = advance(copy.deepcopy(base), last['date'], last['close']) if last else base
+        stored = {
+            'version': STATE_VERSION,
+            'base': base,
+            'last': last,
+            'latest': indicator_values(latest)
+        }
+        tmp_path = f"{self.state_path(crypto_id)}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, self.state_path(crypto_id))
+        return stored['latest']
+
+    @staticmethod
+    def rows_to_points(rows: List[Dict]) -> List[Dict]:
+        points = {}
+        for row in rows:
+            close = row.get('close', row.get('price'))
+            if row.get('date') is None or close is None or close != close:
+                continue
+            points[str(row['date'])[:10]] = float(close)
+        return [{'date': d, 'close': points[d]} for d in sorted(points)]
+
+    def rebuild(self, crypto_id: str, rows: List[Dict]) -> Dict:
+        with metrics.timer('indicator_seconds', mode='rebuild'):
+            points = self.rows_to_points(rows)
+            base = empty_state()
+            for point in points[:-1]:
+                advance(base, point['date'], point['close'])
+            return self.save(crypto_id, base, points[-1] if points else None)
+
+    def append(self, crypto_id: str, new_rows: List[Dict], all_rows_loader=None) -> Optional[Dict]:
+        stored = self.load(crypto_id)
+        points = self.rows_to_points(new_rows)
+        if not points:
+            return stored['latest'] if stored else None
+
+        base = stored['base'] if stored else None
+        last = stored['last'] if stored else None
+
+        # Anything older than the last stored day rewrites history we have
+        # already folded into `base`; only a full rebuild can handle that.
+        if base is None or (last and points[0]['date'] < last['date']) or \
+                (not last and base['last_date'] and points[0]['date'] <= base['last_date']):
+            if all_rows_loader is None:
+                return None
+            metrics.inc('indicator_updates_total', mode='rebuild')
+            return self.rebuild(crypto_id, all_rows_loader())
+
+        metrics.inc('indicator_updates_total', mode='incremental')
+        with metrics.timer('indicator_seconds', mode='incremental'):
+            if last and points[0]['date'] > last['date']:
+                advance(base, last['date'], last['close'])
+            # else: the first new point revises the stored last day and replaces it
+            for point in points[:-1]:
+                advance(base, point['date'], point['close'])
+            return self.save(crypto_id, base, points[-1])
+
+    def latest(self, crypto_id: str) -> Optional[Dict]:
+        stored = self.load(crypto_id)
+        return stored['latest'] if stored else None
+
+    def latest_all(self) -> Dict[str, Dict]:
+        latest = {}
+        for file_name in sorted(os.listdir(self.folder)):
+            if file_name.endswith('.json'):
+                crypto_id = file_name[:-len('.json')]
+                values = self.latest(crypto_id)
+                if values:
+                    latest[crypto_id] = values
+        return latest
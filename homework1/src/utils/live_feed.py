@@ -0,0 +1,292 @@
+import json
+import random
+import threading
+import time
+from typing import List, Dict, Optional
+from src.utils.metrics import metrics
+from src.utils.coin_table import CoinTable
+
+# The only fields pushed to dashboards; everything else changes once per pipeline run.
+FEED_FIELDS = ('current_price', 'price_change_percentage_24h', 'market_cap_rank')
+
+
+def feed_values(crypto: Dict) -> tuple:
+    values = []
+    for field in FEED_FIELDS:
+        value = crypto.get(field)
+        # NaN from pandas means "unknown", same as None
+        values.append(None if value is None or value != value else value)
+    return tuple(values)
+
+
+def feed_rows(cryptocurrencies):
+    """(id, FEED_FIELDS values) per coin; a CoinTable is read column by column."""
+    if isinstance(cryptocurrencies, CoinTable):
+        columns = [cryptocurrencies.values(field) if field in cryptocurrencies.columns
+                   else [None] * len(cryptocurrencies) for field in FEED_FIELDS]
+        return zip(cryptocurrencies.values('id'), zip(*columns))
+    return ((crypto.get('id'), feed_values(crypto)) for crypto in cryptocurrencies)
+
+
+def diff_cryptos(previous: Dict[str, tuple], cryptocurrencies, tolerance: float = 1e-9):
+    """Returns (new state, {id: {field: value}}) with only the fields that moved."""
+    state = {}
+    changes = {}
+    for crypto_id, values in feed_rows(cryptocurrencies):
+        if crypto_id is None:
+            continue
+        state[crypto_id] = values
+        old = previous.get(crypto_id)
+
+        changed = {}
+        for i, field in enumerate(FEED_FIELDS):
+            new_value = values[i]
+            old_value = old[i] if old else None
+            if old is None or (new_value is None) != (old_value is None):
+                changed[field] = new_value
+            elif new_value is not None and abs(new_value - old_value) > tolerance * max(abs(old_value), 1e-12):
+                changed[field] = new_value
+        if changed:
+            changes[crypto_id] = changed
+
+    for crypto_id in previous.keys() - state.keys():
+        changes[crypto_id] = None   # dropped out of the list
+    return state, changes
+
+
+def sse_message(event: str, data, event_id: int = None) -> str:
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class ChangeBatch:
+    """One publish. Serialized once and shared by every subscriber that is keeping up."""
+
+    def __init__(self, changes: Dict[str, Optional[Dict]], version: int):
+        self.changes = changes
+        self.version = version
+        self.encoded = None
+
+    def message(self) -> str:
+        if self.encoded is None:
+            self.encoded = sse_message('changes', {'version': self.version, 'changes': self.changes}, self.version)
+        return self.encoded
+
+
+def merge_batches(batches: List[ChangeBatch]) -> ChangeBatch:
+    merged = {}
+    for batch in batches:
+        for crypto_id, fields in batch.changes.items():
+            current = merged.get(crypto_id)
+            if fields is None or current is None:
+                merged[crypto_id] = None if fields is None else dict(fields)
+            else:
+                current.update(fields)
+    return ChangeBatch(merged, batches[-1].version)
+
+
+class Subscriber:
+    """
+    One open dashboard. Publishes queue up while the client is busy; past
+    `max_batches` they are coalesced into one batch holding the latest value
+    per coin, so a slow connection never holds more than one entry per coin.
+    A backlog over `max_pending` coins is dropped and the client is told to
+    reload the full list instead.
+    """
+
+    def __init__(self, version: int, max_batches: int = 8, max_pending: int = 2000):
+        self.version = version
+        self.max_batches = max_batches
+        self.max_pending = max_pending
+        self.batches = []
+        self.reset = False
+        self.condition = threading.Condition()
+        self.closed = False
+
+    def push(self, batch: ChangeBatch):
+        with self.condition:
+            if not self.reset:
+                self.batches.append(batch)
+                if len(self.batches) > self.max_batches:
+                    self.batches = [merge_batches(self.batches)]
+                    metrics.inc('feed_coalesced_total')
+                    if len(self.batches[0].changes) > self.max_pending:
+                        self.batches = []
+                        self.reset = True
+                        metrics.inc('feed_resets_total')
+            self.version = batch.version
+            self.condition.notify()
+
+    def take(self) -> Optional[str]:
+        """The next message to send (all pending batches coalesced), or None."""
+        with self.condition:
+            if self.reset:
+                self.reset = False
+                return sse_message('reset', {'version': self.version}, self.version)
+            if not self.batches:
+                return None
+            batches, self.batches = self.batches, []
+        if len(batches) == 1:
+            return batches[0].message()
+        metrics.inc('feed_coalesced_total')
+        return merge_batches(batches).message()
+
+    def wait(self, timeout: float) -> bool:
+        with self.condition:
+            if not self.batches and not self.reset and not self.closed:
+                self.condition.wait(timeout)
+            return bool(self.batches or self.reset)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+
+class LiveFeed:
+    """Publishes per-coin diffs of FEED_FIELDS to every subscriber (served as Server-Sent Events)."""
+
+    def __init__(self, cryptocurrencies: List[Dict] = None, coalesce_seconds: float = 1.0,
+                 heartbeat_seconds: float = 15.0, max_subscribers: int = 5000, max_batches: int = 8,
+                 max_pending: int = 2000):
+        self.coalesce_seconds = coalesce_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_subscribers = max_subscribers
+        self.max_batches = max_batches
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.version = 0
+        self.state, _ = diff_cryptos({}, cryptocurrencies or [])
+
+    def publish(self, cryptocurrencies: List[Dict]) -> int:
+        """Diffs a newly loaded coin list against the last one; returns the number of changed coins."""
+        with metrics.timer('feed_publish_seconds'):
+            with self.lock:
+                self.state, changes = diff_cryptos(self.state, cryptocurrencies)
+                if not changes:
+                    return 0
+                self.version += 1
+                batch = ChangeBatch(changes, self.version)
+                subscribers = list(self.subscribers)
+            for subscriber in subscribers:
+                subscriber.push(batch)
+        metrics.inc('feed_changes_total', len(changes))
+        return len(changes)
+
+    def subscribe(self, last_event_id: str = None) -> Optional[Subscriber]:
+        with self.lock:
+            if len(self.subscribers) >= self.max_subscribers:
+                metrics.inc('feed_rejected_total')
+                return None
+            subscriber = Subscriber(self.version, self.max_batches, self.max_pending)
+            # A reconnecting client that missed versions reloads the list once.
+            if last_event_id and last_event_id.isdigit() and int(last_event_id) != self.version:
+                subscriber.reset = True
+            self.subscribers.add(subscriber)
+        metrics.inc('feed_subscriptions_total')
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscriber.close()
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def stream(self, subscriber: Subscriber):
+        """SSE generator for one client. The server pulls the next message only after
+        the previous one was written, so a slow client just coalesces more."""
+        try:
+            yield f"retry: 5000\n{sse_message('hello', {'version': subscriber.version}, subscriber.version)}"
+            last_sent = time.monotonic()
+            while True:
+                if not subscriber.wait(self.heartbeat_seconds):
+                    if subscriber.closed:
+                        return
+                    yield ": heartbeat\n\n"
+                    continue
+
+                # Let a burst of publishes settle into one message
+                delay = self.coalesce_seconds - (time.monotonic() - last_sent)
+                if delay > 0:
+                    time.sleep(delay)
+
+                message = subscriber.take()
+                if message:
+                    metrics.inc('feed_bytes_sent_total', len(message))
+                    last_sent = time.monotonic()
+                    yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+
+class SimulatedPriceSource:
+    """Local random-walk market for exercising the feed without CoinGecko."""
+
+    def __init__(self, cryptocurrencies: List[Dict], move_fraction: float = 0.3,
+                 volatility: float = 0.002, seed: int = 42):
+        self.cryptos = [dict(crypto) for crypto in cryptocurrencies]
+        self.move_fraction = move_fraction
+        self.volatility = volatility
+        self.random = random.Random(seed)
+
+    def tick(self) -> List[Dict]:
+        for crypto in self.cryptos:
+            price = crypto.get('current_price')
+            if not price or price != price or self.random.random() > self.move_fraction:
+                continue
+            move = self.random.gauss(0, self.volatility)
+            crypto['current_price'] = price * (1 + move)
+            if crypto.get('market_cap'):
+                crypto['market_cap'] = crypto['market_cap'] * (1 + move)
+            change = crypto.get('price_change_percentage_24h')
+            if change is not None and change == change:
+                crypto['price_change_percentage_24h'] = change + move * 100
+
+        ranked = sorted(self.cryptos, key=lambda c: -(c.get('market_cap') or 0))
+        for rank, crypto in enumerate(ranked, start=1):
+            crypto['market_cap_rank'] = rank
+        return [dict(crypto) for crypto in ranked]
+
+
+def simulate(cryptocurrencies: List[Dict], ticks: int = 60, clients: int = 1000,
+             slow_every: int = 10, slow_fraction: float = 0.1, seed: int = 42) -> Dict:
+    """
+    Publishes `ticks` simulated updates to `clients` subscribers and compares
+    the bytes sent with re-downloading the full /api/cryptos list every tick.
+    Slow clients only read every `slow_every` ticks, so their changes coalesce.
+    """
+    source = SimulatedPriceSource(cryptocurrencies, seed=seed)
+    feed = LiveFeed(cryptocurrencies)
+    subscribers = [feed.subscribe() for _ in range(clients)]
+    slow = set(range(int(clients * slow_fraction)))
+
+    sent_bytes = 0
+    messages = 0
+    max_queued = 0
+    full_list_bytes = 0
+    start = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        snapshot = source.tick()
+        feed.publish(snapshot)
+        full_list_bytes += len(json.dumps(snapshot, default=str))
+        for i, subscriber in enumerate(subscribers):
+            max_queued = max(max_queued, len(subscriber.batches))
+            if i in slow and tick % slow_every:
+                continue
+            message = subscriber.take()
+            if message:
+                sent_bytes += len(message)
+                messages += 1
+
+    return {
+        'clients': clients,
+        'ticks': ticks,
+        'seconds': time.perf_counter() - start,
+        'messages': messages,
+        'bytes_sent': sent_bytes,
+        'bytes_per_client_tick': sent_bytes / max(clients * ticks, 1),
+        'full_list_bytes_per_client_tick': full_list_bytes / max(ticks, 1),
+        'max_queued_batches': max_queued,
+    }
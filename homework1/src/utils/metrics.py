@@ -0,0 +1,229 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.bucket_counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+
+class MetricsRegistry:
+    """
+    Counters, histograms and spans for one process.
+
+    Metric names follow Prometheus conventions (`*_total` for counters,
+    `*_seconds` / `*_bytes` for histograms); labels are passed as keyword
+    arguments, e.g. `metrics.inc('rows_total', 120, stage='filter2', coin='bitcoin')`.
+    """
+
+    def __init__(self, max_spans: int = 10000):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.max_spans = max_spans
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+            self.spans = []
+            self.span_ids = 0
+            self.started_at = time.time()
+
+    @staticmethod
+    def key(name: str, labels: Dict) -> tuple:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def error(self, stage: str, error: BaseException, **labels):
+        self.inc('errors_total', stage=stage, error=type(error).__name__, **labels)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def current_span(self) -> Optional[Dict]:
+        stack = getattr(self.local, 'stack', None)
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+
+        parent = stack[-1] if stack else None
+        with self.lock:
+            self.span_ids += 1
+            span_id = self.span_ids
+
+        span = {
+            'id': span_id,
+            'parent_id': parent['id'] if parent else None,
+            'trace_id': parent['trace_id'] if parent else span_id,
+            'name': name,
+            'attributes': attributes,
+            'start': time.time(),
+            'duration': None,
+            'status': 'OK'
+        }
+        stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span['status'] = 'ERROR'
+            span['error'] = type(e).__name__
+            raise
+        finally:
+            span['duration'] = time.perf_counter() - start
+            stack.pop()
+            self.observe('span_seconds', span['duration'], span=name)
+            with self.lock:
+                if len(self.spans) < self.max_spans:
+                    self.spans.append(span)
+
+    def counter_value(self, name: str, **labels) -> float:
+        return self.counters.get(self.key(name, labels), 0)
+
+    def totals_by(self, name: str, label: str) -> Dict[str, float]:
+        totals = {}
+        with self.lock:
+            for (metric, labels), value in self.counters.items():
+                if metric != name:
+                    continue
+                group = dict(labels).get(label)
+                totals[group] = totals.get(group, 0) + value
+        return totals
+
+    def histogram_sums(self) -> Dict[str, float]:
+        sums = {}
+        with self.lock:
+            for (name, _), histogram in self.histograms.items():
+                sums[name] = sums.get(name, 0) + histogram.sum
+        return sums
+
+    def report(self, include_spans: bool = True) -> Dict:
+        with self.lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                dict({'name': name, 'labels': dict(labels)}, **histogram.summary())
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ]
+            spans = list(self.spans) if include_spans else []
+
+        report = {
+            'started_at': self.started_at,
+            'generated_at': time.time(),
+            'counters': counters,
+            'histograms': histograms
+        }
+        if include_spans:
+            report['spans'] = spans
+        return report
+
+    def write_report(self, path: str, extra: Dict = None):
+        report = self.report()
+        if extra:
+            report['summary'] = extra
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+
+    @staticmethod
+    def format_labels(labels, extra: Dict = None) -> str:
+        items = list(labels) + list((extra or {}).items())
+        if not items:
+            return ''
+        escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in items]
+        return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+    def to_prometheus(self, prefix: str = 'crypto_') -> str:
+        lines = []
+        with self.lock:
+            counter_names = sorted({name for name, _ in self.counters})
+            for metric in counter_names:
+                lines.append(f'# TYPE {prefix}{metric} counter')
+                for (name, labels), value in sorted(self.counters.items()):
+                    if name == metric:
+                        lines.append(f'{prefix}{name}{self.format_labels(labels)} {value}')
+
+            histogram_names = sorted({name for name, _ in self.histograms})
+            for metric in histogram_names:
+                lines.append(f'# TYPE {prefix}{metric} histogram')
+                for (name, labels), histogram in sorted(self.histograms.items()):
+                    if name != metric:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                        cumulative += count
+                        lines.append(f'{prefix}{name}_bucket{self.format_labels(labels, {"le": bound})} {cumulative}')
+                    lines.append(f'{prefix}{name}_bucket{self.format_labels(labels, {"le": "+Inf"})} {histogram.count}')
+                    lines.append(f'{prefix}{name}_sum{self.format_labels(labels)} {histogram.sum}')
+                    lines.append(f'{prefix}{name}_count{self.format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,185 @@
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional
+from src.utils.metrics import metrics
+
+OHLCV_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+DEFAULT_THRESHOLDS = {
+    'spike_k': 10.0,                   # |return - median| > k * MAD
+    'stale_run_days': 5,               # identical closes for this many days in a row
+    'relative_tolerance': 1e-6,        # float noise allowed in OHLC comparisons
+    # Quarantine when any of these is exceeded
+    'max_ohlc_violation_ratio': 0.01,
+    'max_missing_day_ratio': 0.05,
+    'max_zero_volume_run': 30,
+    'max_stale_run': 30,
+    'max_spike_ratio': 0.01,
+}
+
+
+def run_lengths(mask: np.ndarray) -> np.ndarray:
+    """Lengths of consecutive True runs in a boolean array."""
+    if mask.size == 0:
+        return np.array([], dtype=np.int64)
+    padded = np.concatenate([[False], mask, [False]]).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[1::2] - edges[::2]
+
+
+def audit_frame(df: pd.DataFrame, thresholds: Dict = None) -> Dict:
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    tolerance = thresholds['relative_tolerance']
+
+    total = len(df)
+    result = {'rows': total}
+    if total == 0:
+        result['quarantine'] = True
+        result['quarantine_reasons'] = 'EMPTY'
+        return result
+
+    dates = pd.to_datetime(df['date'], errors='coerce').to_numpy(dtype='datetime64[D]')
+    order = np.argsort(dates, kind='stable')
+    dates = dates[order]
+    o = df['open'].to_numpy(dtype=float)[order]
+    h = df['high'].to_numpy(dtype=float)[order]
+    l = df['low'].to_numpy(dtype=float)[order]
+    c = df['close'].to_numpy(dtype=float)[order]
+    v = df['volume'].to_numpy(dtype=float)[order] if 'volume' in df.columns else np.full(total, np.nan)
+
+    # OHLC consistency: low <= open/close <= high
+    body_low = np.minimum(o, c)
+    body_high = np.maximum(o, c)
+    ohlc_bad = (l > body_low * (1 + tolerance)) | (h < body_high * (1 - tolerance)) | (l > h)
+    result['ohlc_violations'] = int(np.count_nonzero(ohlc_bad))
+    result['nonpositive_prices'] = int(np.count_nonzero(~(c > 0)))
+
+    # Zero-volume runs
+    zero_runs = run_lengths(v == 0)
+    result['zero_volume_days'] = int(zero_runs.sum())
+    result['longest_zero_volume_run'] = int(zero_runs.max()) if zero_runs.size else 0
+
+    # Stale prices: the same close repeated day after day
+    repeated = np.concatenate([[False], c[1:] == c[:-1]])
+    stale_runs = run_lengths(repeated) + 1
+    stale_runs = stale_runs[stale_runs >= thresholds['stale_run_days']]
+    result['stale_runs'] = int(stale_runs.size)
+    result['longest_stale_run'] = int(stale_runs.max()) if stale_runs.size else 0
+
+    # Return spikes beyond k * MAD of log returns
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(np.where(c > 0, c, np.nan)))
+    returns = returns[np.isfinite(returns)]
+    spikes = 0
+    if returns.size > 2:
+        median = np.median(returns)
+        mad = 1.4826 * np.median(np.abs(returns - median))
+        if mad > 0:
+            spikes = int(np.count_nonzero(np.abs(returns - median) > thresholds['spike_k'] * mad))
+    result['return_spikes'] = spikes
+
+    # Date gaps and duplicates
+    valid_dates = dates[~np.isnat(dates)]
+    steps = np.diff(valid_dates).astype(np.int64)
+    result['duplicate_dates'] = int(np.count_nonzero(steps == 0))
+    gaps = steps[steps > 1]
+    result['date_gaps'] = int(gaps.size)
+    result['missing_days'] = int((gaps - 1).sum())
+    result['longest_gap_days'] = int(gaps.max() - 1) if gaps.size else 0
+    result['first_date'] = str(valid_dates[0]) if valid_dates.size else None
+    result['last_date'] = str(valid_dates[-1]) if valid_dates.size else None
+
+    span_days = int((valid_dates[-1] - valid_dates[0]).astype(np.int64)) + 1 if valid_dates.size else 0
+
+    reasons = []
+    if result['ohlc_violations'] > thresholds['max_ohlc_violation_ratio'] * total:
+        reasons.append('OHLC_INCONSISTENT')
+    if span_days and result['missing_days'] > thresholds['max_missing_day_ratio'] * span_days:
+        reasons.append('DATE_GAPS')
+    if result['longest_zero_volume_run'] > thresholds['max_zero_volume_run']:
+        reasons.append('ZERO_VOLUME')
+    if result['longest_stale_run'] > thresholds['max_stale_run']:
+        reasons.append('STALE_PRICE')
+    if returns.size and spikes > thresholds['max_spike_ratio'] * returns.size:
+        reasons.append('RETURN_SPIKES')
+    if result['nonpositive_prices']:
+        reasons.append('NONPOSITIVE_PRICE')
+
+    result['quarantine'] = bool(reasons)
+    result['quarantine_reasons'] = ';'.join(reasons)
+    return result
+
+
+def audit_file(file_path: str, thresholds: Dict = None) -> Dict:
+    crypto_id = os.path.basename(file_path).replace('.csv', '')
+    try:
+        df = pd.read_csv(file_path, usecols=lambda col: col in OHLCV_COLUMNS)
+        missing = [col for col in OHLCV_COLUMNS if col != 'volume' and col not in df.columns]
+        if missing:
+            return {'crypto_id': crypto_id, 'rows': len(df), 'quarantine': True,
+                    'quarantine_reasons': 'MISSING_COLUMNS', 'error': ','.join(missing)}
+        result = audit_frame(df, thresholds)
+    except Exception as e:
+        return {'crypto_id': crypto_id, 'rows': 0, 'quarantine': True,
+                'quarantine_reasons': 'UNREADABLE', 'error': type(e).__name__}
+
+    result['crypto_id'] = crypto_id
+    return result
+
+
+class QualityAuditor:
+
+    def __init__(self, base_path: str = "data", thresholds: Dict = None, workers: Optional[int] = None):
+        self.base_path = base_path
+        self.thresholds = thresholds
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.results = []
+
+    def audit_corpus(self) -> List[Dict]:
+        files = sorted(glob.glob(f"{self.base_path}/historical/*.csv"))
+
+        with metrics.span('quality_audit', files=len(files)):
+            if self.workers > 1 and len(files) > 1:
+                chunk = max(1, len(files) // (self.workers * 4))
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    self.results = list(pool.map(audit_file, files, [self.thresholds] * len(files), chunksize=chunk))
+            else:
+                self.results = [audit_file(f, self.thresholds) for f in files]
+
+        for result in self.results:
+            metrics.inc('quality_audited_total', quarantine=result['quarantine'])
+            for reason in filter(None, result.get('quarantine_reasons', '').split(';')):
+                metrics.inc('quality_issues_total', reason=reason)
+
+        return self.results
+
+    def write_report(self, write_quarantine: bool = True) -> str:
+        os.makedirs(f"{self.base_path}/processed", exist_ok=True)
+        report_path = f"{self.base_path}/processed/quality_report.csv"
+
+        df = pd.DataFrame(self.results)
+        if not df.empty:
+            columns = ['crypto_id'] + [col for col in df.columns if col != 'crypto_id']
+            df = df[columns].sort_values('crypto_id')
+        df.to_csv(report_path, index=False)
+
+        if write_quarantine:
+            quarantined = {
+                r['crypto_id']: r['quarantine_reasons'].split(';')
+                for r in self.results if r.get('quarantine')
+            }
+            with open(f"{self.base_path}/processed/quarantine.json", 'w') as f:
+                json.dump(quarantined, f, indent=2, sort_keys=True)
+
+        return report_path
+
+    def load_quarantine(self) -> Dict[str, List[str]]:
+        path = f"{self.base_path}/processed/quarantine.json"
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
@@ -0,0 +1,381 @@
+import heapq
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Callable
+
+
+class SystemClock:
+
+    def now(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class FakeClock:
+
+    def __init__(self, start: float = 0.0):
+        self.current = start
+
+    def now(self) -> float:
+        return self.current
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.current += seconds
+
+
+class RequestBudget:
+    """Token bucket: `requests_per_hour` refill rate, at most `burst` requests back to back."""
+
+    def __init__(self, clock, requests_per_hour: int = 600, burst: int = 10):
+        self.clock = clock
+        # The burst stays well below the hourly budget, so one hour can overshoot
+        # `requests_per_hour` by at most half; the long-run rate is exact.
+        self.capacity = float(max(1, min(burst, requests_per_hour // 2)))
+        self.rate = max(requests_per_hour, 1) / 3600.0
+        self.tokens = self.capacity
+        self.last_refill = clock.now()
+        self.used = 0
+
+    def refill(self):
+        now = self.clock.now()
+        elapsed = max(0.0, now - self.last_refill)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.last_refill = now
+
+    def try_consume(self, cost: int = 1) -> bool:
+        self.refill()
+        if self.tokens + 1e-9 < cost:
+            return False
+        self.tokens -= cost
+        self.used += cost
+        return True
+
+    def charge(self, extra: int):
+        # Fetchers report how many upstream requests they really made; the
+        # bucket may go negative and then simply refills before the next call.
+        # A negative extra (nothing reached the network) hands the reserved token back.
+        if extra > 0:
+            self.tokens -= extra
+            self.used += extra
+        elif extra < 0:
+            self.tokens = min(self.capacity, self.tokens - extra)
+            self.used += extra
+
+    def seconds_until(self, cost: int = 1) -> float:
+        self.refill()
+        missing = cost - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate > 0 else float('inf')
+
+
+class RefreshScheduler:
+    """
+    Priority queue of coins keyed by their next due time.
+
+    Each coin's refresh interval shrinks with market-cap rank and recent
+    volatility and grows with its failure rate. Coins that are due wait in a
+    second queue ordered by deadline (due time plus a few intervals), so when the
+    budget is short the top of the market is kept current within minutes
+    while the long tail is refreshed lazily with whatever budget is left.
+    """
+
+    def __init__(self, fetcher: Callable[[Dict], Dict], clock=None,
+                 requests_per_hour: int = 600, burst: int = 10,
+                 min_interval: float = 300, max_interval: float = 7 * 24 * 3600,
+                 reference_volatility: float = 0.05, lateness_factor: float = 4):
+        self.fetcher = fetcher
+        self.clock = clock or SystemClock()
+        self.budget = RequestBudget(self.clock, requests_per_hour, burst)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.reference_volatility = reference_volatility
+        self.lateness_factor = lateness_factor
+        self.coins = {}
+        self.queue = []
+        self.ready = []
+        self.sequence = 0
+        self.history = []
+
+    def add_coin(self, crypto: Dict, last_refresh: Optional[float] = None):
+        crypto_id = crypto['id']
+        rank = crypto.get('market_cap_rank')
+        if rank is None or (isinstance(rank, float) and math.isnan(rank)):
+            rank = len(self.coins) + 1
+
+        change = crypto.get('price_change_percentage_24h')
+        volatility = abs(change) / 100 if isinstance(change, (int, float)) and not math.isnan(change) else 0.0
+
+        self.coins[crypto_id] = {
+            'crypto': crypto,
+            'rank': int(rank),
+            'volatility': volatility,
+            'last_refresh': last_refresh,
+            'last_attempt': None,
+            'attempts': 0,
+            'failures': 0,
+            'consecutive_failures': 0,
+        }
+        self.schedule(crypto_id)
+
+    def load_cryptocurrencies(self, cryptocurrencies: List[Dict], last_dates: Dict[str, Optional[str]] = None):
+        last_dates = last_dates or {}
+        for crypto in cryptocurrencies:
+            last_date = last_dates.get(crypto['id'])
+            last_refresh = None
+            if last_date:
+                # Daily candles: the stored date covers the whole day.
+                day_end = datetime.strptime(last_date, '%Y-%m-%d') + timedelta(days=1)
+                last_refresh = day_end.timestamp()
+            self.add_coin(crypto, last_refresh)
+
+    def failure_rate(self, state: Dict) -> float:
+        # Smoothed so a single early failure does not dominate.
+        return state['failures'] / (state['attempts'] + 1)
+
+    def refresh_interval(self, crypto_id: str) -> float:
+        state = self.coins[crypto_id]
+
+        rank_factor = math.sqrt(state['rank'])
+        volatility_factor = 1 + state['volatility'] / self.reference_volatility
+        failure_factor = 1 + 4 * self.failure_rate(state)
+
+        interval = self.min_interval * rank_factor * failure_factor / volatility_factor
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def retry_delay(self, crypto_id: str) -> float:
+        state = self.coins[crypto_id]
+        backoff = self.min_interval * (2 ** min(state['consecutive_failures'] - 1, 10))
+        return min(backoff, self.refresh_interval(crypto_id))
+
+    def next_due(self, crypto_id: str) -> float:
+        state = self.coins[crypto_id]
+        if state['consecutive_failures'] > 0:
+            # Retries back off exponentially from the failed attempt, but never
+            # wait longer than the coin's regular interval.
+            return state['last_attempt'] + self.retry_delay(crypto_id)
+        if state['last_refresh'] is None:
+            return self.clock.now()
+        return state['last_refresh'] + self.refresh_interval(crypto_id)
+
+    def staleness(self, crypto_id: str) -> float:
+        state = self.coins[crypto_id]
+        if state['last_refresh'] is None:
+            return float('inf')
+        return self.clock.now() - state['last_refresh']
+
+    def schedule(self, crypto_id: str):
+        state = self.coins[crypto_id]
+        self.sequence += 1
+        state['due'] = self.next_due(crypto_id)
+        # Ties (e.g. never refreshed coins) go to the better ranked coin first.
+        heapq.heappush(self.queue, (state['due'], state['rank'], self.sequence, crypto_id))
+
+    def peek_due(self) -> Optional[float]:
+        while self.queue:
+            due, _, _, crypto_id = self.queue[0]
+            if crypto_id in self.coins and self.coins[crypto_id].get('due') == due:
+                return due
+            heapq.heappop(self.queue)
+        return None
+
+    def promote_due(self):
+        now = self.clock.now()
+        while True:
+            due = self.peek_due()
+            if due is None or due > now:
+                break
+            _, _, sequence, crypto_id = heapq.heappop(self.queue)
+            # Earliest deadline first: a coin may be late by a few of its
+            # own intervals, so top coins win under load but the tail never starves.
+            deadline = due + self.lateness_factor * self.refresh_interval(crypto_id)
+            heapq.heappush(self.ready, (deadline, due, sequence, crypto_id))
+
+    def refresh_one(self, crypto_id: str) -> Dict:
+        state = self.coins[crypto_id]
+        state['attempts'] += 1
+        state['last_attempt'] = self.clock.now()
+
+        try:
+            result = self.fetcher(state['crypto']) or {}
+        except Exception as e:
+            result = {'success': False, 'error': type(e).__name__}
+
+        self.budget.charge(int(result.get('requests_used', 1)) - 1)
+
+        if result.get('success'):
+            state['last_refresh'] = self.clock.now()
+            state['consecutive_failures'] = 0
+            if result.get('volatility') is not None:
+                state['volatility'] = float(result['volatility'])
+        else:
+            state['failures'] += 1
+            state['consecutive_failures'] += 1
+
+        self.schedule(crypto_id)
+
+        record = {
+            'crypto_id': crypto_id,
+            'time': self.clock.now(),
+            'success': bool(result.get('success')),
+            'rows': result.get('rows', 0),
+            'error': result.get('error')
+        }
+        self.history.append(record)
+        return record
+
+    def run_pending(self, max_refreshes: int = None) -> List[Dict]:
+        refreshed = []
+        while max_refreshes is None or len(refreshed) < max_refreshes:
+            self.promote_due()
+            if not self.ready:
+                break
+            if not self.budget.try_consume(1):
+                break
+            _, _, _, crypto_id = heapq.heappop(self.ready)
+            refreshed.append(self.refresh_one(crypto_id))
+        return refreshed
+
+    def seconds_until_next(self) -> float:
+        if self.ready:
+            return self.budget.seconds_until(1)
+        due = self.peek_due()
+        if due is None:
+            return self.max_interval
+        wait_due = max(0.0, due - self.clock.now())
+        return max(wait_due, self.budget.seconds_until(1))
+
+    def run_forever(self, duration: float = None, max_sleep: float = 60):
+        start = self.clock.now()
+        while duration is None or self.clock.now() - start < duration:
+            self.run_pending()
+            wait = min(self.seconds_until_next(), max_sleep)
+            if duration is not None:
+                wait = min(wait, start + duration - self.clock.now())
+            self.clock.sleep(max(wait, 0.01))
+
+    def status(self) -> List[Dict]:
+        rows = []
+        for crypto_id, state in self.coins.items():
+            rows.append({
+                'crypto_id': crypto_id,
+                'rank': state['rank'],
+                'staleness_seconds': self.staleness(crypto_id),
+                'refresh_interval': self.refresh_interval(crypto_id),
+                'volatility': state['volatility'],
+                'attempts': state['attempts'],
+                'failures': state['failures']
+            })
+        return sorted(rows, key=lambda r: r['rank'])
+
+
+class YahooRefreshFetcher:
+    """Refreshes one coin from Yahoo Finance, appending only the missing days."""
+
+    def __init__(self, filter2, csv_manager):
+        self.filter2 = filter2
+        self.csv_manager = csv_manager
+        self.yahoo_symbols = {}
+
+    def __call__(self, crypto: Dict) -> Dict:
+        crypto_id = crypto['id']
+        # Only calls that reached Yahoo count; symbol probes answered from the HTTP cache are free.
+        network_calls = self.filter2.yahoo.network_calls
+
+        yahoo_symbol = self.yahoo_symbols.get(crypto_id)
+        if yahoo_symbol is None:
+            yahoo_symbol = self.filter2.get_best_yahoo_symbol(crypto)
+            if not yahoo_symbol:
+                return {'success': False, 'error': 'NO_YAHOO_SYMBOL',
+                        'requests_used': self.filter2.yahoo.network_calls - network_calls}
+            self.yahoo_symbols[crypto_id] = yahoo_symbol
+
+        last_date = self.csv_manager.get_last_date_for_crypto(crypto_id)
+        new_data = self.filter2.fetch_recent_data(yahoo_symbol, last_date)
+        requests_used = self.filter2.yahoo.network_calls - network_calls
+
+        if not new_data:
+            return {'success': False, 'error': 'NO_DATA', 'requests_used': requests_used}
+
+        self.csv_manager.append_historical_data(crypto_id, new_data)
+
+        return {
+            'success': True,
+            'rows': len(new_data),
+            'volatility': recent_volatility(new_data),
+            'requests_used': requests_used
+        }
+
+
+def recent_volatility(rows: List[Dict]) -> Optional[float]:
+    closes = [r['close'] for r in rows if r.get('close')]
+    if len(closes) < 2:
+        return None
+    returns = [abs(b / a - 1) for a, b in zip(closes, closes[1:]) if a > 0]
+    return sum(returns) / len(returns) if returns else None
+
+
+class FakeUpstream:
+    """Offline stand-in for Yahoo: random failures per coin, random-walk volatility."""
+
+    def __init__(self, clock, failure_rates: Dict[str, float] = None,
+                 default_failure_rate: float = 0.02, seed: int = 42):
+        self.clock = clock
+        self.failure_rates = failure_rates or {}
+        self.default_failure_rate = default_failure_rate
+        self.random = random.Random(seed)
+        self.calls = []
+
+    def __call__(self, crypto: Dict) -> Dict:
+        self.calls.append((self.clock.now(), crypto['id']))
+        failure_rate = self.failure_rates.get(crypto['id'], self.default_failure_rate)
+        if self.random.random() < failure_rate:
+            return {'success': False, 'error': 'HTTPError', 'requests_used': 1}
+        return {
+            'success': True,
+            'rows': 1,
+            'volatility': abs(self.random.gauss(0, 0.03)),
+            'requests_used': 1
+        }
+
+
+def simulate(cryptocurrencies: List[Dict], hours: float = 24, requests_per_hour: int = 600,
+             failure_rates: Dict[str, float] = None, seed: int = 42, **scheduler_options) -> Dict:
+    clock = FakeClock(start=datetime(2025, 1, 1).timestamp())
+    upstream = FakeUpstream(clock, failure_rates=failure_rates, seed=seed)
+    scheduler = RefreshScheduler(upstream, clock=clock, requests_per_hour=requests_per_hour, **scheduler_options)
+
+    for crypto in cryptocurrencies:
+        scheduler.add_coin(crypto, last_refresh=clock.now() - 2 * 24 * 3600)
+
+    duration = hours * 3600
+    start = clock.now()
+    max_staleness = {}
+    calls_per_hour = {}
+
+    # Step through the run a minute at a time so staleness is sampled while
+    # running, not only at the end.
+    while clock.now() - start < duration:
+        step = min(60.0, start + duration - clock.now())
+        scheduler.run_forever(duration=step)
+        # Ignore the warm-up period while the initial backlog drains.
+        if clock.now() - start >= min(duration / 4, 6 * 3600):
+            for crypto_id in scheduler.coins:
+                max_staleness[crypto_id] = max(max_staleness.get(crypto_id, 0), scheduler.staleness(crypto_id))
+
+    for call_time, _ in upstream.calls:
+        hour = int((call_time - start) // 3600)
+        calls_per_hour[hour] = calls_per_hour.get(hour, 0) + 1
+
+    return {
+        'requests_used': scheduler.budget.used,
+        'max_requests_in_hour': max(calls_per_hour.values()) if calls_per_hour else 0,
+        'max_staleness': max_staleness,
+        'status': scheduler.status()
+    }
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from typing import List, Dict, Optional
+from src.utils.metrics import metrics
+
+ROLLUP_VERSION = 2
+
+# Finest first; the API picks the finest one that fits the requested viewport.
+RESOLUTIONS = ('day', 'week', 'month')
+
+# Buckets per tile. Tiles are aligned to fixed calendar positions, so a tile's
+# span never moves and its content only changes when its own days change.
+TILE_SIZE = 256
+
+# One row per bucket: start date, first open, max high, min low, last close, summed volume, days present
+FIELDS = ['date', 'open', 'high', 'low', 'close', 'volume', 'days']
+
+EPOCH = date(1970, 1, 1)
+WEEK_EPOCH = date(1970, 1, 5)   # first Monday
+
+
+def bucket_index(day: date, resolution: str) -> int:
+    if resolution == 'day':
+        return (day - EPOCH).days
+    if resolution == 'week':
+        return (day - WEEK_EPOCH).days // 7
+    return day.year * 12 + day.month - 1
+
+
+def bucket_start(index: int, resolution: str) -> date:
+    if resolution == 'day':
+        return EPOCH + timedelta(days=index)
+    if resolution == 'week':
+        return WEEK_EPOCH + timedelta(days=index * 7)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def bucket_count(start: date, end: date, resolution: str) -> int:
+    return bucket_index(end, resolution) - bucket_index(start, resolution) + 1
+
+
+def daily_points(rows: List[Dict]) -> List[tuple]:
+    """(date, open, high, low, close, volume) per day, last row per date wins; close falls back to price."""
+    points = {}
+    for row in rows:
+        close = row.get('close', row.get('price'))
+        if row.get('date') is None or close is None or close != close:
+            continue
+        close = float(close)
+        values = [close if row.get(f) is None or row.get(f) != row.get(f) else float(row[f])
+                  for f in ('open', 'high', 'low')]
+        volume = row.get('volume')
+        volume = 0.0 if volume is None or volume != volume else float(volume)
+        points[str(row['date'])[:10]] = (*values, close, volume)
+    return [(date.fromisoformat(d), *points[d]) for d in sorted(points)]
+
+
+def rollup(points: List[tuple], resolution: str) -> List[tuple]:
+    """(bucket index, row) per bucket, rows laid out as FIELDS."""
+    buckets = []
+    current = None
+    for day, open_, high, low, close, volume in points:
+        index = bucket_index(day, resolution)
+        if current is None or index != current[0]:
+            current = [index, bucket_start(index, resolution).isoformat(), open_, high, low, close, volume, 1]
+            buckets.append(current)
+        else:
+            current[3] = max(current[3], high)
+            current[4] = min(current[4], low)
+            current[5] = close
+            current[6] += volume
+            current[7] += 1
+    return [(bucket[0], bucket[1:]) for bucket in buckets]
+
+
+def tile_hash(rows: List[list]) -> str:
+    return hashlib.sha1(json.dumps(rows, separators=(',', ':')).encode()).hexdigest()[:16]
+
+
+def build_tiles(points: List[tuple], resolution: str) -> Dict[str, Dict]:
+    tiles = {}
+    for index, row in rollup(points, resolution):
+        tile_index = index // TILE_SIZE
+        tile = tiles.get(tile_index)
+        if tile is None:
+            tile = tiles[tile_index] = {
+                'index': tile_index,
+                'start': bucket_start(tile_index * TILE_SIZE, resolution).isoformat(),
+                # exclusive
+                'end': bucket_start((tile_index + 1) * TILE_SIZE, resolution).isoformat(),
+                'rows': [],
+            }
+        tile['rows'].append(row)
+
+    for tile in tiles.values():
+        # Content hash: the tile URL carries it, so a served tile never changes.
+        tile['hash'] = tile_hash(tile['rows'])
+        tile['count'] = len(tile['rows'])
+    return {str(index): tiles[index] for index in sorted(tiles)}
+
+
+class RollupStore:
+    """
+    Weekly and monthly OHLC rollups plus fixed-size time tiles per coin in
+    data/rollups/<id>.json, written by Filter3. Charts request only the
+    resolution and tiles covering their viewport instead of the whole history.
+    """
+
+    def __init__(self, base_path: str = "data"):
+        self.base_path = base_path
+        self.folder = f"{base_path}/rollups"
+        os.makedirs(self.folder, exist_ok=True)
+
+    def path(self, crypto_id: str) -> str:
+        return f"{self.folder}/{crypto_id}.json"
+
+    def build(self, crypto_id: str, rows: List[Dict]) -> Optional[Dict]:
+        with metrics.timer('rollup_seconds'):
+            points = daily_points(rows)
+            if not points:
+                return None
+            stored = {
+                'version': ROLLUP_VERSION,
+                'fields': FIELDS,
+                'tile_size': TILE_SIZE,
+                'first_date': points[0][0].isoformat(),
+                'last_date': points[-1][0].isoformat(),
+                'days': len(points),
+                'resolutions': {resolution: build_tiles(points, resolution) for resolution in RESOLUTIONS},
+            }
+            # The pipeline and the API may rebuild the same coin at once; each writes its own temp file.
+            with tempfile.NamedTemporaryFile('w', dir=self.folder, suffix='.tmp', delete=False) as f:
+                json.dump(stored, f, separators=(',', ':'))
+            os.replace(f.name, self.path(crypto_id))
+        metrics.inc('rollup_tiles_total', sum(len(t) for t in stored['resolutions'].values()))
+        return stored
+
+    def load(self, crypto_id: str) -> Optional[Dict]:
+        path = self.path(crypto_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get('version') != ROLLUP_VERSION:
+            return None
+        return stored
+
+
+def choose_resolution(start: date, end: date, max_points: int) -> str:
+    """Finest resolution with at most `max_points` buckets between start and end."""
+    for resolution in RESOLUTIONS:
+        if bucket_count(start, end, resolution) <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def viewport(stored: Dict, start: date = None, end: date = None, max_points: int = 1000,
+             resolution: str = None) -> Dict:
+    """Resolution and tile descriptors (no rows) covering [start, end]."""
+    start = start or date.fromisoformat(stored['first_date'])
+    end = end or date.fromisoformat(stored['last_date'])
+    resolution = resolution or choose_resolution(start, end, max_points)
+
+    first = bucket_index(start, resolution) // TILE_SIZE
+    last = bucket_index(end, resolution) // TILE_SIZE
+    tiles = [
+        {key: tile[key] for key in ('index', 'start', 'end', 'hash', 'count')}
+        for index, tile in stored['resolutions'][resolution].items()
+        if first <= int(index) <= last
+    ]
+    return {
+        'resolution': resolution,
+        'fields': stored['fields'],
+        'first_date': stored['first_date'],
+        'last_date': stored['last_date'],
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'tiles': tiles,
+    }
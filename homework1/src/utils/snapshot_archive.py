@@ -0,0 +1,351 @@
+import bisect
+import json
+import math
+import os
+import struct
+import time
+import zlib
+import numpy as np
+from datetime import datetime, timezone
+from typing import List, Dict, Optional
+from src.utils.metrics import metrics
+
+LENGTH = struct.Struct('<I')
+MISSING_STRING = -1
+
+
+def to_timestamp(value) -> float:
+    if value is None:
+        return time.time()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def is_number(value) -> bool:
+    if value is None or isinstance(value, bool):
+        return value is None
+    return isinstance(value, (int, float, np.integer, np.floating))
+
+
+class ArchiveState:
+    """The market list as of one record of the log, column by column."""
+
+    def __init__(self):
+        self.coins = []            # coin index -> id
+        self.coin_index = {}
+        self.strings = []          # string code -> value
+        self.string_index = {}
+        self.members = np.zeros(0, dtype=bool)
+        self.columns = {}          # field -> (kind, values over coin indexes)
+        self.field_order = []
+        self.timestamp = None
+
+    def add_dictionary(self, coins: List[str], strings: List[str]):
+        for coin_id in coins:
+            self.coin_index[coin_id] = len(self.coins)
+            self.coins.append(coin_id)
+        for value in strings:
+            self.string_index[value] = len(self.strings)
+            self.strings.append(value)
+
+        grow = len(self.coins) - self.members.size
+        if grow > 0:
+            self.members = np.concatenate([self.members, np.zeros(grow, dtype=bool)])
+            for field, (kind, values) in self.columns.items():
+                self.columns[field] = (kind, np.concatenate([values, self.empty(kind, grow)]))
+
+    @staticmethod
+    def empty(kind: str, size: int) -> np.ndarray:
+        return np.full(size, np.nan) if kind == 'f8' else np.full(size, MISSING_STRING, dtype=np.int64)
+
+    def column(self, field: str, kind: str) -> np.ndarray:
+        if field not in self.columns or self.columns[field][0] != kind:
+            self.columns[field] = (kind, self.empty(kind, self.members.size))
+        return self.columns[field][1]
+
+    def value(self, field: str, index: int):
+        if field not in self.columns or not self.members[index]:
+            return None
+        kind, values = self.columns[field]
+        value = values[index]
+        if kind == 'str':
+            return None if value == MISSING_STRING else self.strings[value]
+        if math.isnan(value):
+            return None
+        return int(value) if value.is_integer() and abs(value) < 2 ** 53 else float(value)
+
+    def records(self) -> List[Dict]:
+        members = np.flatnonzero(self.members)
+        if 'market_cap_rank' in self.columns:
+            ranks = self.columns['market_cap_rank'][1][members]
+            members = members[np.argsort(np.where(np.isnan(ranks), np.inf, ranks), kind='stable')]
+        return [{field: self.value(field, i) for field in self.field_order} for i in members]
+
+
+class SnapshotArchive:
+    """
+    Append-only log of market-list snapshots in data/archive/snapshots.log.
+
+    A record is a JSON header followed by two zlib blocks: the ids and strings
+    seen for the first time (dictionary codes are shared by the whole log),
+    and the columns as (coin index, value) pairs. Delta records keep only the
+    cells that differ from the previous snapshot; every `keyframe_interval`
+    records a full keyframe bounds how much a point-in-time read replays.
+    """
+
+    def __init__(self, base_path: str = "data", keyframe_interval: int = 48):
+        self.folder = f"{base_path}/archive"
+        self.log_path = f"{self.folder}/snapshots.log"
+        self.keyframe_interval = keyframe_interval
+        os.makedirs(self.folder, exist_ok=True)
+        self.index = []
+        self.timestamps_index = []
+        self.indexed_size = 0
+        self.state = None          # writer-side state after the last record
+
+    # Reading
+
+    def refresh_index(self):
+        """Picks up records appended since the last call, also by other processes."""
+        if not os.path.exists(self.log_path) or os.path.getsize(self.log_path) == self.indexed_size:
+            return
+        with open(self.log_path, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            f.seek(self.indexed_size)
+            while True:
+                offset = f.tell()
+                raw = f.read(LENGTH.size)
+                if len(raw) < LENGTH.size:
+                    break
+                try:
+                    header = json.loads(f.read(LENGTH.unpack(raw)[0]))
+                except ValueError:
+                    break
+                body_offset = f.tell()
+                body_size = header['dictionary_size'] + header['columns_size']
+                if body_offset + body_size > file_size:
+                    # Half-written last record (crash while appending)
+                    break
+                f.seek(body_offset + body_size)
+                self.index.append({'header': header, 'offset': offset, 'body_offset': body_offset})
+                self.timestamps_index.append(header['timestamp'])
+                self.indexed_size = f.tell()
+
+    def read_dictionary(self, f, entry: Dict):
+        header = entry['header']
+        if not header['dictionary_size']:
+            return [], []
+        f.seek(entry['body_offset'])
+        dictionary = json.loads(zlib.decompress(f.read(header['dictionary_size'])))
+        return dictionary['coins'], dictionary['strings']
+
+    def apply_columns(self, f, state: ArchiveState, entry: Dict):
+        header = entry['header']
+        f.seek(entry['body_offset'] + header['dictionary_size'])
+        data = zlib.decompress(f.read(header['columns_size'])) if header['columns_size'] else b''
+
+        def indexes(spec) -> np.ndarray:
+            return np.frombuffer(data, dtype='<u4', count=spec['count'], offset=spec['offset'])
+
+        if header['kind'] == 'key':
+            state.members[:] = False
+            for kind, values in state.columns.values():
+                values[:] = np.nan if kind == 'f8' else MISSING_STRING
+        state.members[indexes(header['removed'])] = False
+        state.members[indexes(header['added'])] = True
+        if 'field_order' in header:
+            state.field_order = header['field_order']
+
+        for field, spec in header['fields'].items():
+            coin_indexes = indexes(spec)
+            values = np.frombuffer(data, dtype='<f8' if spec['kind'] == 'f8' else '<i8',
+                                   count=spec['count'], offset=spec['offset'] + coin_indexes.nbytes)
+            state.column(field, spec['kind'])[coin_indexes] = values
+        state.timestamp = header['timestamp']
+
+    def replay(self, first: int, last: int):
+        """Yields the state after each record first..last, starting from the keyframe before `first`."""
+        keyframe = first
+        while keyframe > 0 and self.index[keyframe]['header']['kind'] != 'key':
+            keyframe -= 1
+
+        state = ArchiveState()
+        with open(self.log_path, 'rb') as f:
+            # Dictionaries are cumulative, so their blocks are read from the start.
+            for entry in self.index[:keyframe]:
+                state.add_dictionary(*self.read_dictionary(f, entry))
+            for position in range(keyframe, last + 1):
+                entry = self.index[position]
+                state.add_dictionary(*self.read_dictionary(f, entry))
+                self.apply_columns(f, state, entry)
+                if position >= first:
+                    yield state
+
+    def position_at(self, timestamp: float = None) -> int:
+        self.refresh_index()
+        if timestamp is None:
+            return len(self.index) - 1
+        return bisect.bisect_right(self.timestamps_index, timestamp) - 1
+
+    def state_at(self, timestamp: float = None) -> Optional[ArchiveState]:
+        position = self.position_at(timestamp)
+        if position < 0:
+            return None
+        state = None
+        for state in self.replay(position, position):
+            pass
+        return state
+
+    def snapshot_at(self, timestamp=None) -> Optional[Dict]:
+        """The market list as it was at `timestamp` (epoch seconds or ISO string)."""
+        with metrics.timer('archive_seconds', operation='snapshot_at'):
+            state = self.state_at(None if timestamp is None else to_timestamp(timestamp))
+            if state is None:
+                return None
+            return {'timestamp': state.timestamp, 'cryptos': state.records()}
+
+    def timestamps(self) -> List[float]:
+        self.refresh_index()
+        return list(self.timestamps_index)
+
+    def field_history(self, crypto_id: str, field: str, start=None, end=None) -> List[Dict]:
+        """Values of one field for one coin, one entry per change."""
+        first = 0 if start is None else max(self.position_at(to_timestamp(start)), 0)
+        last = self.position_at(None if end is None else to_timestamp(end))
+        if last < 0:
+            return []
+
+        history = []
+        with metrics.timer('archive_seconds', operation='field_history'):
+            for state in self.replay(first, last):
+                index = state.coin_index.get(crypto_id)
+                value = state.value(field, index) if index is not None else None
+                if not history or value != history[-1]['value']:
+                    history.append({'timestamp': state.timestamp, 'value': value})
+        return history
+
+    # Writing
+
+    def append(self, cryptocurrencies: List[Dict], timestamp=None) -> Dict:
+        self.refresh_index()
+        if self.state is None or self.state.timestamp != (self.timestamps_index[-1] if self.index else None):
+            self.state = self.state_at() or ArchiveState()
+        state = self.state
+
+        timestamp = to_timestamp(timestamp)
+        if self.index and timestamp <= self.timestamps_index[-1]:
+            raise ValueError("Snapshots must be appended in time order")
+        keyframe = len(self.index) % self.keyframe_interval == 0
+
+        new_coins, new_strings = [], []
+        pending_coins, pending_strings = {}, {}
+
+        def coin_code(coin_id: str) -> int:
+            if coin_id in state.coin_index:
+                return state.coin_index[coin_id]
+            if coin_id not in pending_coins:
+                pending_coins[coin_id] = len(state.coins) + len(new_coins)
+                new_coins.append(coin_id)
+            return pending_coins[coin_id]
+
+        def string_code(value) -> int:
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                return MISSING_STRING
+            value = str(value)
+            if value in state.string_index:
+                return state.string_index[value]
+            if value not in pending_strings:
+                pending_strings[value] = len(state.strings) + len(new_strings)
+                new_strings.append(value)
+            return pending_strings[value]
+
+        indexes = np.array([coin_code(crypto['id']) for crypto in cryptocurrencies], dtype=np.int64)
+        field_order = list(cryptocurrencies[0].keys()) if cryptocurrencies else []
+
+        size = len(state.coins) + len(new_coins)
+        members = np.zeros(size, dtype=bool)
+        members[indexes] = True
+        previous_members = np.zeros(size, dtype=bool)
+        if not keyframe:
+            previous_members[:state.members.size] = state.members
+
+        chunks, offset = [], 0
+
+        def add_chunk(array: np.ndarray) -> int:
+            nonlocal offset
+            start = offset
+            chunks.append(array.tobytes())
+            offset += array.nbytes
+            return start
+
+        header = {'timestamp': timestamp, 'kind': 'key' if keyframe else 'delta'}
+        for name, mask in (('added', members & ~previous_members), ('removed', previous_members & ~members)):
+            changed = np.flatnonzero(mask).astype('<u4')
+            header[name] = {'count': int(changed.size), 'offset': add_chunk(changed)}
+
+        fields = {}
+        for field in field_order:
+            raw = [crypto.get(field) for crypto in cryptocurrencies]
+            if all(is_number(v) for v in raw):
+                kind = 'f8'
+                values = np.array([np.nan if v is None else v for v in raw], dtype='<f8')
+            else:
+                kind = 'str'
+                values = np.array([string_code(v) for v in raw], dtype='<i8')
+
+            if keyframe or field not in state.columns or state.columns[field][0] != kind:
+                changed = np.ones(values.size, dtype=bool)
+            else:
+                previous = ArchiveState.empty(kind, values.size)
+                known = indexes < state.members.size
+                previous[known] = state.columns[field][1][indexes[known]]
+                if kind == 'f8':
+                    same = (values == previous) | (np.isnan(values) & np.isnan(previous))
+                else:
+                    same = values == previous
+                # Coins missing from the previous snapshot are always written out
+                changed = ~(same & previous_members[indexes])
+
+            if not changed.any():
+                continue
+            changed_indexes = indexes[changed].astype('<u4')
+            fields[field] = {'kind': kind, 'count': int(changed_indexes.size), 'offset': add_chunk(changed_indexes)}
+            add_chunk(values[changed])
+
+        dictionary = zlib.compress(json.dumps({'coins': new_coins, 'strings': new_strings}).encode(), 6) \
+            if new_coins or new_strings else b''
+        columns = zlib.compress(b''.join(chunks), 6) if offset else b''
+
+        header['fields'] = fields
+        header['dictionary_size'] = len(dictionary)
+        header['columns_size'] = len(columns)
+        if keyframe or field_order != state.field_order:
+            header['field_order'] = field_order
+
+        header_bytes = json.dumps(header).encode()
+        record = LENGTH.pack(len(header_bytes)) + header_bytes + dictionary + columns
+        with metrics.timer('write_seconds', stage='archive'):
+            with open(self.log_path, 'ab') as f:
+                f.write(record)
+                f.flush()
+                os.fsync(f.fileno())
+        metrics.inc('bytes_written_total', len(record), stage='archive')
+
+        # Move the writer state forward without replaying the log.
+        self.refresh_index()
+        state.add_dictionary(new_coins, new_strings)
+        with open(self.log_path, 'rb') as f:
+            self.apply_columns(f, state, self.index[-1])
+
+        return {
+            'timestamp': timestamp,
+            'kind': header['kind'],
+            'bytes': len(record),
+            'changed_cells': sum(spec['count'] for spec in fields.values()),
+        }
@@ -0,0 +1,222 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Optional
+from src.utils.metrics import metrics
+
+HISTORY_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'source', 'price']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS coins (
+    id TEXT PRIMARY KEY,
+    symbol TEXT,
+    name TEXT,
+    market_cap_rank INTEGER,
+    market_cap REAL,
+    current_price REAL,
+    total_volume REAL,
+    price_change_percentage_24h REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coins_symbol ON coins (symbol);
+CREATE INDEX IF NOT EXISTS coins_rank ON coins (market_cap_rank);
+
+CREATE TABLE IF NOT EXISTS history (
+    coin_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    source TEXT,
+    price REAL,
+    PRIMARY KEY (coin_id, date)
+) WITHOUT ROWID;
+"""
+
+
+def clean_value(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+class SQLStore:
+    """
+    SQLite mirror of data/raw and data/historical.
+
+    `history` is clustered on (coin_id, date), so one coin's date range is a
+    single index range scan, and appends are upserts inside one transaction.
+    """
+
+    def __init__(self, db_path: str = "data/crypto.db"):
+        self.db_path = db_path
+        self.local = threading.local()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        # One connection per thread; Flask serves requests from several threads.
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def upsert_coins(self, cryptocurrencies: List[Dict]):
+        rows = []
+        for crypto in cryptocurrencies:
+            record = {k: clean_value(v) for k, v in crypto.items()}
+            rows.append((
+                record['id'], record.get('symbol'), record.get('name'), record.get('market_cap_rank'),
+                record.get('market_cap'), record.get('current_price'), record.get('total_volume'),
+                record.get('price_change_percentage_24h'), json.dumps(record, default=str)
+            ))
+
+        with metrics.timer('write_seconds', stage='database'):
+            with self.connection() as conn:
+                conn.execute("DELETE FROM coins")
+                conn.executemany("INSERT INTO coins VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def upsert_history(self, crypto_id: str, rows: List[Dict], replace: bool = False) -> int:
+        values = [
+            (crypto_id, str(row['date'])[:10]) + tuple(clean_value(row.get(col)) for col in HISTORY_COLUMNS[1:])
+            for row in rows if row.get('date') is not None
+        ]
+        # Rows from Yahoo carry no separate price column; it mirrors close.
+        values = [v[:-1] + ((v[-1] if v[-1] is not None else v[5]),) for v in values]
+
+        with metrics.timer('write_seconds', stage='database', coin=crypto_id):
+            with self.connection() as conn:
+                if replace:
+                    conn.execute("DELETE FROM history WHERE coin_id = ?", (crypto_id,))
+                conn.executemany(
+                    """
+                    INSERT INTO history (coin_id, date, open, high, low, close, volume, source, price)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (coin_id, date) DO UPDATE SET
+                        open = excluded.open, high = excluded.high, low = excluded.low,
+                        close = excluded.close, volume = excluded.volume,
+                        source = excluded.source, price = excluded.price
+                    """,
+                    values
+                )
+        metrics.inc('rows_written_total', len(values), stage='database', coin=crypto_id)
+        return len(values)
+
+    def has_history(self, crypto_id: str) -> bool:
+        row = self.connection().execute("SELECT 1 FROM history WHERE coin_id = ? LIMIT 1", (crypto_id,)).fetchone()
+        return row is not None
+
+    def history(self, crypto_id: str, start: str = None, end: str = None) -> List[Dict]:
+        sql = f"SELECT {', '.join(HISTORY_COLUMNS)} FROM history WHERE coin_id = ?"
+        params = [crypto_id]
+        if start:
+            sql += " AND date >= ?"
+            params.append(start)
+        if end:
+            sql += " AND date <= ?"
+            params.append(end)
+        sql += " ORDER BY date"
+        return [dict(row) for row in self.connection().execute(sql, params)]
+
+    def history_dates(self, crypto_id: str) -> List[str]:
+        rows = self.connection().execute("SELECT date FROM history WHERE coin_id = ? ORDER BY date", (crypto_id,))
+        return [row['date'] for row in rows]
+
+    def last_date(self, crypto_id: str) -> Optional[str]:
+        row = self.connection().execute("SELECT MAX(date) AS d FROM history WHERE coin_id = ?", (crypto_id,)).fetchone()
+        return row['d'] if row else None
+
+    def history_span(self, crypto_id: str) -> Dict:
+        """Last date and number of priced days, enough to tell whether derived data is current."""
+        row = self.connection().execute(
+            "SELECT MAX(date) AS last_date, COUNT(DISTINCT date) AS days FROM history "
+            "WHERE coin_id = ? AND COALESCE(close, price) IS NOT NULL",
+            (crypto_id,)
+        ).fetchone()
+        return {'last_date': row['last_date'], 'days': row['days']}
+
+    def delete_invalid_prices(self, crypto_id: str) -> int:
+        with self.connection() as conn:
+            conn.execute("UPDATE history SET price = close WHERE coin_id = ? AND price IS NULL", (crypto_id,))
+            cursor = conn.execute("DELETE FROM history WHERE coin_id = ? AND NOT (price > 0)", (crypto_id,))
+        return cursor.rowcount
+
+    def statistics(self, crypto_id: str) -> Dict:
+        """Same fields as Filter3.calculate_statistics, computed inside SQLite."""
+        conn = self.connection()
+        row = conn.execute(
+            """
+            SELECT COUNT(*) AS total_records, MIN(date) AS first_date, MAX(date) AS last_date,
+                   MIN(price) AS price_min, MAX(price) AS price_max, AVG(price) AS price_mean
+            FROM history WHERE coin_id = ?
+            """,
+            (crypto_id,)
+        ).fetchone()
+
+        if not row or row['total_records'] == 0:
+            return {}
+
+        total = row['total_records']
+        stats = {
+            'total_records': total,
+            'date_range': f"{row['first_date']} до {row['last_date']}",
+            'price_min': row['price_min'],
+            'price_max': row['price_max'],
+            'price_mean': row['price_mean'],
+            'data_quality': 'GOOD' if total > 100 else 'INSUFFICIENT'
+        }
+
+        # Two passes over the days that have a range: the mean first, then the
+        # squared deviations from it (E[x^2] - E[x]^2 cancels badly for large prices).
+        spread = conn.execute(
+            """
+            SELECT COUNT(*) AS n, AVG(r.daily_range) AS mean,
+                   SUM((r.daily_range - m.mean) * (r.daily_range - m.mean)) AS squares
+            FROM (SELECT high - low AS daily_range FROM history
+                  WHERE coin_id = ? AND high IS NOT NULL AND low IS NOT NULL) AS r,
+                 (SELECT AVG(high - low) AS mean FROM history
+                  WHERE coin_id = ? AND high IS NOT NULL AND low IS NOT NULL) AS m
+            """,
+            (crypto_id, crypto_id)
+        ).fetchone()
+
+        if spread['n']:
+            stats.update({
+                'ohlc_available': True,
+                'avg_daily_range': spread['mean'],
+                # Sample standard deviation, like pandas .std(); undefined for a single day
+                'volatility': math.sqrt(spread['squares'] / (spread['n'] - 1)) if spread['n'] > 1 else None
+            })
+
+        return stats
+
+    def import_csv_folder(self, base_path: str = "data") -> int:
+        import glob
+        import pandas as pd
+
+        coins_path = f"{base_path}/raw/top_cryptocurrencies.csv"
+        if os.path.exists(coins_path):
+            self.upsert_coins(pd.read_csv(coins_path).to_dict('records'))
+
+        imported = 0
+        for file_path in sorted(glob.glob(f"{base_path}/historical/*.csv")):
+            crypto_id = os.path.basename(file_path).replace('.csv', '')
+            df = pd.read_csv(file_path)
+            if 'price' not in df.columns and 'close' in df.columns:
+                df['price'] = df['close']
+            self.upsert_history(crypto_id, df.to_dict('records'), replace=True)
+            imported += 1
+        return imported
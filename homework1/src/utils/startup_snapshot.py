@@ -0,0 +1,92 @@
+import os
+import pickle
+from typing import List, Dict, Optional
+from src.utils.coin_table import CoinTable
+
+# Bump when the layout of the pickled dict changes; old snapshots are ignored.
+SNAPSHOT_VERSION = 2
+
+
+def top_mover(cryptos_list: List[Dict], highest: bool = True) -> Optional[Dict]:
+    valid_cryptos = [c for c in cryptos_list if c.get('price_change_percentage_24h') is not None]
+    if not valid_cryptos:
+        return None
+
+    pick = max if highest else min
+    top = pick(valid_cryptos, key=lambda x: x['price_change_percentage_24h'])
+    return {
+        'name': top.get('name'),
+        'symbol': top.get('symbol'),
+        'change': top.get('price_change_percentage_24h')
+    }
+
+
+def compute_market_stats(cryptos_list: List[Dict]) -> Dict:
+    total_market_cap = sum(crypto.get('market_cap', 0) or 0 for crypto in cryptos_list)
+    total_volume = sum(crypto.get('total_volume', 0) or 0 for crypto in cryptos_list)
+
+    bitcoin = next((c for c in cryptos_list if c.get('id') == 'bitcoin'), None)
+    btc_dominance = 0
+    if bitcoin and total_market_cap > 0:
+        btc_cap = bitcoin.get('market_cap', 0) or 0
+        btc_dominance = (btc_cap / total_market_cap) * 100
+
+    return {
+        'total_cryptocurrencies': len(cryptos_list),
+        'total_market_cap': total_market_cap,
+        'total_volume_24h': total_volume,
+        'bitcoin_dominance': btc_dominance,
+        'top_gainer': top_mover(cryptos_list, highest=True),
+        'top_loser': top_mover(cryptos_list, highest=False)
+    }
+
+
+def build_snapshot(csv_path: str) -> Dict:
+    # pandas is only needed to build the snapshot, never to read it back.
+    import numpy as np
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    df = df.replace({np.nan: None})
+    # Plain Python scalars, so the pickle loads without numpy.
+    cryptos_list = [
+        {k: (v.item() if isinstance(v, np.generic) else v) for k, v in record.items()}
+        for record in df.to_dict(orient="records")
+    ]
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'source_mtime': os.path.getmtime(csv_path),
+        # Columnar, a fraction of the size of one dict per coin (see coin_table.py)
+        'table': CoinTable.from_records(cryptos_list),
+        'stats': compute_market_stats(cryptos_list)
+    }
+
+
+def write_snapshot(csv_path: str, snapshot_path: str) -> Dict:
+    snapshot = build_snapshot(csv_path)
+    tmp_path = f"{snapshot_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, snapshot_path)
+    return snapshot
+
+
+def load_snapshot(snapshot_path: str, csv_path: str = None) -> Optional[Dict]:
+    """Returns None when the snapshot is missing, from another version, or older than the CSV."""
+    if not os.path.exists(snapshot_path):
+        return None
+
+    try:
+        with open(snapshot_path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except Exception:
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+
+    if csv_path and os.path.exists(csv_path) and os.path.getmtime(csv_path) > snapshot['source_mtime']:
+        return None
+
+    return snapshot
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The pipeline imports its modules as `src.*` from the homework1 folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,23 @@
+import numpy as np
+from benchmarks.synthetic import generate_history
+from src.utils.backtest import IndicatorCache
+from src.utils.indicators import RSI_PERIOD, empty_state, advance, indicator_values
+
+
+def test_rsi_matches_indicator_store():
+    history = generate_history(1, seed=3)
+    close = history['close'].to_numpy(copy=True)
+    # A flat stretch exercises the no-losses case (RSI 100)
+    close[100:120] = close[100]
+
+    state = empty_state()
+    expected = []
+    for date, price in zip(history['date'], close):
+        advance(state, date, float(price))
+        expected.append(indicator_values(state)['rsi_14'])
+    expected = np.array([np.nan if v is None else v for v in expected])
+
+    rsi = IndicatorCache(close).rsi(RSI_PERIOD)
+
+    np.testing.assert_array_equal(np.isnan(rsi), np.isnan(expected))
+    np.testing.assert_allclose(rsi[~np.isnan(rsi)], expected[~np.isnan(expected)], rtol=1e-9)
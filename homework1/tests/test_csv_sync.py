@@ -0,0 +1,66 @@
+import os
+import pandas as pd
+from src.utils.csv_manager import CSVManager
+
+
+def day(date, close):
+    return {'date': date, 'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+            'volume': 100.0, 'source': 'yahoo'}
+
+
+def make_manager(tmp_path):
+    manager = CSVManager(str(tmp_path / "data"), database_path=str(tmp_path / "crypto.db"))
+    dates = pd.date_range('2024-01-01', periods=30).strftime('%Y-%m-%d')
+    manager.save_historical_data('bitcoin', [day(d, 100.0 + i) for i, d in enumerate(dates)])
+    return manager, str(tmp_path / "data" / "historical" / "bitcoin.csv")
+
+
+def no_full_export(crypto_id):
+    raise AssertionError("the CSV was rewritten from the database")
+
+
+def test_refresh_appends_instead_of_rewriting(tmp_path, monkeypatch):
+    manager, file_path = make_manager(tmp_path)
+    monkeypatch.setattr(manager, 'export_history_csv', no_full_export)
+    with open(file_path, 'rb') as f:
+        before = f.read()
+    head = before[:before.rindex(b'2024-01-30')]
+
+    # Incremental fetches start at the last stored day, which comes back revised
+    manager.append_historical_data('bitcoin', [day('2024-01-30', 500.0), day('2024-01-31', 501.0),
+                                               day('2024-02-01', 502.0)])
+
+    with open(file_path, 'rb') as f:
+        after = f.read()
+    # Everything before the revised day is untouched: the file was appended to, not rewritten
+    assert after.startswith(head)
+    df = pd.read_csv(file_path)
+    assert list(df['date'][-3:]) == ['2024-01-30', '2024-01-31', '2024-02-01']
+    assert list(df['close'][-3:]) == [500.0, 501.0, 502.0]
+    assert df['date'].is_unique
+    stored = pd.DataFrame(manager.database.history('bitcoin'))
+    pd.testing.assert_frame_equal(df, stored[df.columns])
+
+
+def test_new_days_only_are_appended(tmp_path, monkeypatch):
+    manager, file_path = make_manager(tmp_path)
+    monkeypatch.setattr(manager, 'export_history_csv', no_full_export)
+    size = os.path.getsize(file_path)
+
+    manager.append_historical_data('bitcoin', [day('2024-01-31', 200.0)])
+
+    with open(file_path, 'rb') as f:
+        f.seek(size)
+        assert f.read().startswith(b'2024-01-31,')
+    assert len(pd.read_csv(file_path)) == 31
+
+
+def test_backfill_rewrites_from_database(tmp_path):
+    manager, file_path = make_manager(tmp_path)
+
+    manager.append_historical_data('bitcoin', [day('2024-01-10', 900.0), day('2024-01-31', 200.0)])
+
+    df = pd.read_csv(file_path)
+    assert len(df) == 31
+    assert df.loc[df['date'] == '2024-01-10', 'close'].item() == 900.0
+    pd.testing.assert_frame_equal(df, pd.DataFrame(manager.database.history('bitcoin')))
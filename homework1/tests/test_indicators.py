@@ -0,0 +1,57 @@
+import math
+import numpy as np
+from benchmarks.synthetic import generate_history
+from src.utils.backtest import IndicatorCache
+from src.utils.indicators import (IndicatorStore, SMA_PERIOD, EMA_PERIODS, RSI_PERIOD,
+                                  MACD_SIGNAL_PERIOD, BOLLINGER_WIDTH)
+
+
+def full_computation(dates, closes) -> dict:
+    """Indicator values for the last day, recomputed over the whole series."""
+    indicators = IndicatorCache(np.asarray(closes, dtype=float))
+    macd, signal = indicators.macd(12, 26, MACD_SIGNAL_PERIOD)
+    sma = indicators.sma(SMA_PERIOD)[-1]
+    std = indicators.rolling_std(SMA_PERIOD)[-1]
+    values = {
+        'date': dates[-1],
+        'close': closes[-1],
+        'sma_20': sma,
+        'macd': macd[-1],
+        'macd_signal': signal[-1],
+        'macd_histogram': macd[-1] - signal[-1],
+        'rsi_14': indicators.rsi(RSI_PERIOD)[-1],
+        'bollinger_upper': sma + BOLLINGER_WIDTH * std,
+        'bollinger_middle': sma,
+        'bollinger_lower': sma - BOLLINGER_WIDTH * std,
+    }
+    values.update({f'ema_{p}': indicators.ema(p)[-1] for p in EMA_PERIODS})
+    return {k: None if isinstance(v, float) and math.isnan(v) else v for k, v in values.items()}
+
+
+def assert_matches(latest: dict, expected: dict):
+    assert latest.keys() == expected.keys()
+    for key, value in expected.items():
+        if value is None or isinstance(value, str):
+            assert latest[key] == value, key
+        else:
+            assert math.isclose(latest[key], value, rel_tol=1e-9, abs_tol=1e-9), key
+
+
+def test_appending_day_by_day_matches_full_computation(tmp_path):
+    history = generate_history(1, seed=7)
+    dates = list(history['date'])
+    final = list(history['close'])
+    # What a refresh sees for today before the daily candle closes
+    provisional = [close * 1.01 for close in final]
+    store = IndicatorStore(str(tmp_path))
+
+    start = 10
+    latest = store.rebuild('coin', [{'date': d, 'close': c} for d, c in zip(dates[:start], final[:start])])
+    assert_matches(latest, full_computation(dates[:start], final[:start]))
+
+    for day in range(start, len(dates)):
+        # Each refresh re-delivers the previous day, now final, plus today's moving candle
+        new_rows = [{'date': dates[day - 1], 'close': final[day - 1]},
+                    {'date': dates[day], 'close': provisional[day]}]
+        latest = store.append('coin', new_rows)
+        assert_matches(latest, full_computation(dates[:day + 1], final[:day] + [provisional[day]]))
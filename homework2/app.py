@@ -1,8 +1,25 @@
-from flask import Flask, jsonify
+import time
+
+STARTUP_BEGIN = time.perf_counter()
+
+from flask import Flask, Response, jsonify, request, g
 from flask_cors import CORS
-import pandas as pd
+from collections import OrderedDict
 import os
-import numpy as np
+import sys
+import threading
+
+# Shared utilities live next to the pipeline in homework1/src
+PIPELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "homework1")
+sys.path.append(PIPELINE_PATH)
+
+from src.utils.metrics import metrics
+from src.utils.startup_snapshot import load_snapshot, write_snapshot, build_snapshot, compute_market_stats
+from src.utils.indicators import IndicatorStore
+from src.utils.sql_store import SQLStore
+from src.utils.live_feed import LiveFeed, SimulatedPriceSource
+from src.utils.coin_table import CoinTable
+from src.utils.rollups import RollupStore, RESOLUTIONS, viewport
 
 app = Flask(__name__)
 CORS(app)
@@ -10,128 +27,563 @@ CORS(app)
 BASE_DATA_PATH = "data"
 TOP_CRYPTOS_PATH = f"{BASE_DATA_PATH}/raw/top_cryptocurrencies.csv"
 HISTORICAL_FOLDER = f"{BASE_DATA_PATH}/historical"
+PIPELINE_METRICS_PATH = f"{BASE_DATA_PATH}/processed/metrics.prom"
+STARTUP_SNAPSHOT_PATH = f"{BASE_DATA_PATH}/processed/startup_snapshot.pkl"
+# Same switch as the pipeline: SQLite is only the source of truth when CRYPTO_DB is set.
+DATABASE_PATH = os.environ.get('CRYPTO_DB')
+# How often the live feed looks for a new coin list; CRYPTO_FEED_SIMULATE=2 ticks a local random walk instead.
+FEED_POLL_SECONDS = float(os.environ.get('CRYPTO_FEED_POLL', 10))
+FEED_SIMULATE_SECONDS = float(os.environ.get('CRYPTO_FEED_SIMULATE', 0))
+
+
+def load_cryptos():
+    """Load the coin list from the pipeline's pickled snapshot, rebuilding it from the CSV if stale"""
+    snapshot = load_snapshot(STARTUP_SNAPSHOT_PATH, TOP_CRYPTOS_PATH)
+    
+    if snapshot is None:
+        # Slow path: parses the CSV with pandas, then saves the snapshot so
+        # the next worker start is fast again.
+        try:
+            snapshot = write_snapshot(TOP_CRYPTOS_PATH, STARTUP_SNAPSHOT_PATH)
+        except OSError:
+            snapshot = build_snapshot(TOP_CRYPTOS_PATH)
+        metrics.inc('startup_snapshot_total', result='rebuilt')
+    else:
+        metrics.inc('startup_snapshot_total', result='loaded')
+    
+    return snapshot
+
+
+snapshot = load_cryptos()
+
+# Columnar coin list; rows are served as lightweight views (see coin_table.py)
+cryptos_table = snapshot['table']
+market_stats = snapshot['stats']
+
+# Pushes price / 24h change / rank diffs to open dashboards (/api/stream)
+feed = LiveFeed(cryptos_table)
+feed_thread = None
+feed_thread_lock = threading.Lock()
+
+indicator_store = IndicatorStore(BASE_DATA_PATH)
+
+# Weekly/monthly rollups and chart tiles per coin, written by Filter3
+rollup_store = RollupStore(BASE_DATA_PATH)
+
+# Populated by build_database.py and kept current by the pipeline under CRYPTO_DB; CSV files otherwise.
+database = SQLStore(DATABASE_PATH) if DATABASE_PATH and os.path.exists(DATABASE_PATH) else None
+
+metrics.observe('startup_seconds', time.perf_counter() - STARTUP_BEGIN)
+first_request_done = False
+
 
-cryptos_df = pd.read_csv(TOP_CRYPTOS_PATH)
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    # /api/cryptos and /api/stats follow the pipeline output whether or not a dashboard is subscribed
+    if feed_thread is None:
+        start_feed_thread()
 
-cryptos_df = cryptos_df.replace({np.nan: None})
 
-cryptos_list = cryptos_df.to_dict(orient="records")
+@app.after_request
+def record_request_latency(response):
+    start = getattr(g, 'request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        metrics.observe('http_request_seconds', time.perf_counter() - start,
+                        route=route, method=request.method)
+        metrics.inc('http_requests_total', route=route, method=request.method, status=response.status_code)
+        # Streamed responses (/api/stream) must not be buffered to measure them
+        if not response.is_streamed:
+            metrics.inc('http_response_bytes_total', response.calculate_content_length() or 0, route=route)
+    
+    global first_request_done
+    if not first_request_done:
+        first_request_done = True
+        metrics.observe('time_to_first_request_seconds', time.perf_counter() - STARTUP_BEGIN)
+    return response
+
+
+@app.route("/metrics")
+def get_metrics():
+    """Prometheus text format: API latency plus the last pipeline run"""
+    body = metrics.to_prometheus(prefix="crypto_api_")
+    
+    if os.path.exists(PIPELINE_METRICS_PATH):
+        with open(PIPELINE_METRICS_PATH) as f:
+            body += f.read()
+    
+    return app.response_class(body, mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/metrics")
+def get_metrics_report():
+    """JSON summary of API request metrics"""
+    return jsonify(metrics.report(include_spans=False))
+
 
 @app.route("/api/cryptos")
 def get_all_cryptos():
-    """Return all cryptos from top-cryptocurrencies.csv"""
-    return jsonify(cryptos_list)
+    """Return all cryptos from top-cryptocurrencies.csv, optionally filtered and sorted
+    on numeric columns, e.g. ?sort=price_change_percentage_24h&order=desc&min_market_cap=1e9&limit=20"""
+    args = request.args
+    if not args:
+        return jsonify(cryptos_table.records())
+    
+    ranges = {}
+    for key, value in args.items():
+        if key.startswith(('min_', 'max_')):
+            low, high = ranges.get(key[4:], (None, None))
+            try:
+                bound = float(value)
+            except ValueError:
+                return jsonify({"error": f"{key} must be a number"}), 400
+            ranges[key[4:]] = (bound, high) if key.startswith('min_') else (low, bound)
+    
+    limit = args.get('limit')
+    if limit is not None and not limit.isdigit():
+        return jsonify({"error": "limit must be a non-negative integer"}), 400
+    
+    try:
+        positions = cryptos_table.query(sort=args.get('sort'), descending=args.get('order') == 'desc',
+                                        limit=int(limit) if limit is not None else None, ranges=ranges)
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": f"Cannot filter or sort on {e}"}), 400
+    
+    return jsonify(cryptos_table.records(positions))
 
 
 @app.route("/api/cryptos/top/<int:limit>")
 def get_top_cryptos(limit):
     """Return top N cryptocurrencies by market cap rank"""
-    top_cryptos = cryptos_list[:limit]
-    return jsonify(top_cryptos)
+    return jsonify(cryptos_table.records(range(min(limit, len(cryptos_table)))))
 
 
 @app.route("/api/cryptos/search")
 def search_cryptos():
     """Search cryptocurrencies by name or symbol"""
-    from flask import request
     query = request.args.get('q', '').lower()
     
     if not query:
         return jsonify([])
     
-    results = [
-        crypto for crypto in cryptos_list
-        if query in str(crypto.get('name', '')).lower() or 
-           query in str(crypto.get('symbol', '')).lower()
-    ]
-    
-    return jsonify(results)
+    return jsonify(cryptos_table.records(cryptos_table.search(query)))
 
 
 @app.route("/api/cryptos/<crypto_id>")
 def get_crypto_details(crypto_id):
     """Return one crypto based on its ID (id column in CSV)"""
-    filtered = cryptos_df[cryptos_df["id"] == crypto_id]
+    crypto = cryptos_table.get(crypto_id)
     
-    if filtered.empty:
+    if crypto is None:
         return jsonify({"error": "Crypto not found"}), 404
     
-    crypto_dict = filtered.iloc[0].to_dict()
-    crypto_dict = {k: (None if pd.isna(v) else v) for k, v in crypto_dict.items()}
+    return jsonify(crypto.to_dict())
+
+
+# Parsed histories kept per worker, bounded by total rows rather than by
+# files: a 10-year history is ~3,650 dicts, so 64 of them would dwarf the coin table.
+HISTORY_CACHE_ROWS = int(os.environ.get('CRYPTO_HISTORY_CACHE_ROWS', 40000))
+history_cache = OrderedDict()
+history_cache_rows = 0
+history_cache_lock = threading.Lock()
+
+
+def load_history(file_path, modified):
+    global history_cache_rows
+    key = (file_path, modified)
+    
+    with history_cache_lock:
+        records = history_cache.get(key)
+        if records is not None:
+            history_cache.move_to_end(key)
+            return records
+    
+    # pandas is imported on the first history request, not at startup.
+    import numpy as np
+    import pandas as pd
+    
+    df = pd.read_csv(file_path)
+    
+    df = df.replace({np.nan: None})
+    
+    records = df.to_dict(orient="records")
+    
+    with history_cache_lock:
+        if key not in history_cache:
+            history_cache[key] = records
+            history_cache_rows += len(records)
+        # Least recently used first; the entry just loaded always stays.
+        while history_cache_rows > HISTORY_CACHE_ROWS and len(history_cache) > 1:
+            _, evicted = history_cache.popitem(last=False)
+            history_cache_rows -= len(evicted)
     
-    return jsonify(crypto_dict)
+    return records
 
 
 @app.route("/api/cryptos/<crypto_id>/history")
 def get_crypto_history(crypto_id):
-    """Return historical data for given crypto by loading <id>.csv"""
+    """Return historical data for given crypto, optionally limited to ?start=YYYY-MM-DD&end=YYYY-MM-DD"""
+    start = request.args.get('start')
+    end = request.args.get('end')
+    
+    if database and database.has_history(crypto_id):
+        return jsonify(database.history(crypto_id, start, end))
+    
     file_path = f"{HISTORICAL_FOLDER}/{crypto_id}.csv"
     
     if not os.path.exists(file_path):
         return jsonify({"error": f"No historical data for {crypto_id}"}), 404
     
-    df = pd.read_csv(file_path)
-    
-    df = df.replace({np.nan: None})
+    records = load_history(file_path, os.path.getmtime(file_path))
+    if start or end:
+        records = [
+            r for r in records
+            if (not start or str(r['date']) >= start) and (not end or str(r['date']) <= end)
+        ]
     
-    return jsonify(df.to_dict(orient="records"))
+    return jsonify(records)
 
 
-@app.route("/api/stats")
-def get_market_stats():
-    """Return overall market statistics"""
-    total_market_cap = sum(crypto.get('market_cap', 0) or 0 for crypto in cryptos_list)
-    total_volume = sum(crypto.get('total_volume', 0) or 0 for crypto in cryptos_list)
+@app.route("/api/cryptos/<crypto_id>/statistics")
+def get_crypto_statistics(crypto_id):
+    """Return record count, date range, price min/max/mean and daily range volatility"""
+    if database and database.has_history(crypto_id):
+        return jsonify(database.statistics(crypto_id))
+    
+    file_path = f"{HISTORICAL_FOLDER}/{crypto_id}.csv"
+    
+    if not os.path.exists(file_path):
+        return jsonify({"error": f"No historical data for {crypto_id}"}), 404
+    
+    import pandas as pd
     
-    # Get Bitcoin dominance
-    bitcoin = next((c for c in cryptos_list if c.get('id') == 'bitcoin'), None)
-    btc_dominance = 0
-    if bitcoin and total_market_cap > 0:
-        btc_cap = bitcoin.get('market_cap', 0) or 0
-        btc_dominance = (btc_cap / total_market_cap) * 100
+    df = pd.DataFrame(load_history(file_path, os.path.getmtime(file_path)))
+    price_column = 'price' if 'price' in df.columns else 'close'
     
     stats = {
-        'total_cryptocurrencies': len(cryptos_list),
-        'total_market_cap': total_market_cap,
-        'total_volume_24h': total_volume,
-        'bitcoin_dominance': btc_dominance,
-        'top_gainer': get_top_gainer(),
-        'top_loser': get_top_loser()
+        'total_records': len(df),
+        'date_range': f"{df['date'].min()} до {df['date'].max()}",
+        'price_min': float(df[price_column].min()),
+        'price_max': float(df[price_column].max()),
+        'price_mean': float(df[price_column].mean()),
+        'data_quality': 'GOOD' if len(df) > 100 else 'INSUFFICIENT'
     }
+    if all(col in df.columns for col in ['open', 'high', 'low', 'close']):
+        daily_range = df['high'].astype(float) - df['low'].astype(float)
+        stats.update({
+            'ohlc_available': True,
+            'avg_daily_range': float(daily_range.mean()),
+            'volatility': float(daily_range.std())
+        })
     
     return jsonify(stats)
 
 
-def get_top_gainer():
-    """Find cryptocurrency with highest 24h percentage change"""
+@app.route("/api/cryptos/<crypto_id>/indicators")
+def get_crypto_indicators(crypto_id):
+    """Return the latest SMA/EMA/RSI/MACD/Bollinger values kept up to date by the pipeline"""
+    latest = indicator_store.latest(crypto_id)
+    
+    if latest is None:
+        file_path = f"{HISTORICAL_FOLDER}/{crypto_id}.csv"
+        if not os.path.exists(file_path):
+            return jsonify({"error": f"No historical data for {crypto_id}"}), 404
+        # First request for a coin the pipeline has not indexed yet.
+        latest = indicator_store.rebuild(crypto_id, load_history(file_path, os.path.getmtime(file_path)))
+    
+    return jsonify(latest)
+
+
+@app.route("/api/indicators")
+def get_all_indicators():
+    """Return the latest indicator values for every coin with stored state"""
+    return jsonify(indicator_store.latest_all())
+
+
+# Parsed rollups, one version per coin, bounded by total rollup rows like the
+# history cache: a 10-year coin is ~4,300 rows (about 1.8 MB of parsed JSON).
+ROLLUP_CACHE_ROWS = int(os.environ.get('CRYPTO_ROLLUP_CACHE_ROWS', 40000))
+rollup_cache = OrderedDict()
+rollup_cache_rows = 0
+rollup_cache_lock = threading.Lock()
+
+
+def rollup_rows(stored):
+    return sum(tile['count'] for tiles in stored['resolutions'].values() for tile in tiles.values())
+
+
+def load_rollups(crypto_id, modified):
+    global rollup_cache_rows
+    
+    with rollup_cache_lock:
+        cached = rollup_cache.get(crypto_id)
+        if cached is not None and cached[0] == modified:
+            rollup_cache.move_to_end(crypto_id)
+            return cached[1]
+    
+    stored = rollup_store.load(crypto_id)
+    if stored is None:
+        return None
+    rows = rollup_rows(stored)
+    
+    with rollup_cache_lock:
+        previous = rollup_cache.get(crypto_id)
+        # Keyed by coin, so loading a newer file drops the version it replaces
+        if previous is None or previous[0] < modified:
+            if previous is not None:
+                rollup_cache_rows -= previous[2]
+            rollup_cache[crypto_id] = (modified, stored, rows)
+            rollup_cache_rows += rows
+        rollup_cache.move_to_end(crypto_id)
+        while rollup_cache_rows > ROLLUP_CACHE_ROWS and len(rollup_cache) > 1:
+            _, (_, _, evicted_rows) = rollup_cache.popitem(last=False)
+            rollup_cache_rows -= evicted_rows
+    
+    return stored
+
+
+def get_rollups(crypto_id):
+    """Rollups written by Filter3; rebuilt here if missing or behind the coin's history source"""
+    path = rollup_store.path(crypto_id)
+    stored = load_rollups(crypto_id, os.path.getmtime(path)) if os.path.exists(path) else None
+    file_path = f"{HISTORICAL_FOLDER}/{crypto_id}.csv"
+
+    if database and database.has_history(crypto_id):
+        span = database.history_span(crypto_id)
+        if stored is None or (stored['last_date'], stored['days']) != (span['last_date'], span['days']):
+            stored = rollup_store.build(crypto_id, database.history(crypto_id))
+    elif os.path.exists(file_path):
+        if stored is None or os.path.getmtime(path) < os.path.getmtime(file_path):
+            stored = rollup_store.build(crypto_id, load_history(file_path, os.path.getmtime(file_path)))
+    return stored
+
+
+@app.route("/api/cryptos/<crypto_id>/tiles")
+def get_crypto_tiles(crypto_id):
+    """Return the resolution and chart tiles covering a viewport,
+    e.g. ?start=2023-01-01&end=2024-01-01&points=800 (optional &resolution=day|week|month)"""
+    from datetime import date
+
+    stored = get_rollups(crypto_id)
+    if stored is None:
+        return jsonify({"error": f"No historical data for {crypto_id}"}), 404
+
+    resolution = request.args.get('resolution')
+    if resolution is not None and resolution not in RESOLUTIONS:
+        return jsonify({"error": f"resolution must be one of {', '.join(RESOLUTIONS)}"}), 400
+
+    try:
+        start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({"error": "start and end must be YYYY-MM-DD"}), 400
+    points = max(request.args.get('points', 1000, type=int), 1)
+
+    view = viewport(stored, start, end, points, resolution)
+    for tile in view['tiles']:
+        tile['url'] = f"/api/cryptos/{crypto_id}/tiles/{view['resolution']}/{tile['index']}/{tile['hash']}"
+
+    # The tile list changes whenever the pipeline adds days; revalidate it.
+    response = jsonify(view)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@app.route("/api/cryptos/<crypto_id>/tiles/<resolution>/<int:index>/<tile_hash>")
+def get_crypto_tile(crypto_id, resolution, index, tile_hash):
+    """Return one chart tile; the URL carries the content hash, so it can be cached forever"""
+    stored = get_rollups(crypto_id)
+    tile = stored['resolutions'].get(resolution, {}).get(str(index)) if stored else None
+
+    if tile is None or tile['hash'] != tile_hash:
+        return jsonify({"error": "Tile not found; request the tile list again"}), 404
+
+    response = jsonify({'resolution': resolution, 'fields': stored['fields'], **tile})
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.set_etag(tile_hash)
+    return response.make_conditional(request)
+
+
+def backtest_arguments(crypto_id):
+    # Imported on first use: the backtester needs numpy/pandas.
+    from src.utils import backtest
+    
+    strategy = request.args.get('strategy', 'sma_crossover')
+    if strategy not in backtest.STRATEGIES:
+        return None, (jsonify({"error": f"Unknown strategy {strategy}",
+                               "strategies": backtest.STRATEGIES}), 400)
+    
+    try:
+        costs = {key: backtest.parse_param(key, request.args.get(key, default))
+                 for key, default in (('fee', '0.001'), ('slippage', '0.0005'))}
+    except ValueError:
+        return None, (jsonify({"error": "fee and slippage must be numbers"}), 400)
+    
+    prices = backtest.load_prices(crypto_id, BASE_DATA_PATH, database,
+                                  request.args.get('start'), request.args.get('end'))
+    if len(prices) < 2:
+        return None, (jsonify({"error": f"No historical data for {crypto_id}"}), 404)
+    
+    return (backtest, strategy, prices, costs), None
+
+
+@app.route("/api/cryptos/<crypto_id>/backtest")
+def get_crypto_backtest(crypto_id):
+    """Simulate one indicator strategy, e.g. ?strategy=rsi_bands&lower=25&upper=75&fee=0.001"""
+    parsed, error = backtest_arguments(crypto_id)
+    if error:
+        return error
+    backtest, strategy, prices, costs = parsed
+    
+    try:
+        params = {key: backtest.parse_param(key, request.args[key])
+                  for key in backtest.STRATEGIES[strategy] if key in request.args}
+    except ValueError:
+        return jsonify({"error": "Periods (fast, slow, signal, period) must be positive integers, "
+                                 "other parameters numbers"}), 400
+    
+    result = backtest.backtest(prices, strategy, params, **costs)
+    result['crypto_id'] = crypto_id
+    
+    return jsonify(result)
+
+
+@app.route("/api/cryptos/<crypto_id>/backtest/sweep")
+def get_crypto_backtest_sweep(crypto_id):
+    """Parameter sweep, e.g. ?strategy=sma_crossover&fast=5,10,20&slow=50,100,200"""
+    parsed, error = backtest_arguments(crypto_id)
+    if error:
+        return error
+    backtest, strategy, prices, costs = parsed
+    
+    try:
+        grid = {key: [backtest.parse_param(key, v) for v in request.args.get(key, str(default)).split(',')]
+                for key, default in backtest.STRATEGIES[strategy].items()}
+    except ValueError:
+        return jsonify({"error": "Sweep values must be comma separated numbers; "
+                                 "periods (fast, slow, signal, period) positive integers"}), 400
+    
+    if backtest.grid_size(grid) > backtest.MAX_SWEEP_COMBINATIONS:
+        return jsonify({"error": f"At most {backtest.MAX_SWEEP_COMBINATIONS} parameter combinations per sweep"}), 400
+    
+    results = backtest.sweep(prices, strategy, grid, **costs)
+    results.sort(key=lambda r: r['stats']['sharpe'], reverse=True)
+    
+    return jsonify({'crypto_id': crypto_id, 'strategy': strategy, 'results': results})
+
+
+def apply_cryptos(new_cryptos, stats=None):
+    """Swap in a newly loaded coin list and push what changed to the live feed"""
+    global cryptos_table, market_stats
+    table = new_cryptos if isinstance(new_cryptos, CoinTable) else CoinTable.from_records(new_cryptos)
+    market_stats = stats or compute_market_stats(table)
+    # One assignment, so requests never see a half-updated list
+    cryptos_table = table
+    feed.publish(table)
+
+
+def source_mtime():
+    paths = [p for p in (TOP_CRYPTOS_PATH, STARTUP_SNAPSHOT_PATH) if os.path.exists(p)]
+    return max((os.path.getmtime(p) for p in paths), default=None)
+
+
+def watch_market():
+    if FEED_SIMULATE_SECONDS:
+        source = SimulatedPriceSource(cryptos_table)
+        while True:
+            time.sleep(FEED_SIMULATE_SECONDS)
+            apply_cryptos(source.tick())
+    
+    seen = source_mtime()
+    while True:
+        time.sleep(FEED_POLL_SECONDS)
+        modified = source_mtime()
+        if modified == seen:
+            continue
+        seen = modified
+        try:
+            reloaded = load_cryptos()
+        except Exception as e:
+            metrics.error('feed', e)
+            continue
+        apply_cryptos(reloaded['table'], reloaded['stats'])
+
+
+def start_feed_thread():
+    # Started with the first request rather than at import, so importing
+    # app.py (tests, benchmarks, the reloader's parent process) stays side-effect free.
+    global feed_thread
+    with feed_thread_lock:
+        if feed_thread is None:
+            feed_thread = threading.Thread(target=watch_market, name="market-feed", daemon=True)
+            feed_thread.start()
+
+
+@app.route("/api/stream")
+def stream_market_changes():
+    """Server-Sent Events with only the changed price, 24h change and rank of each coin.
+    Every open stream holds a server thread, so the server must run threaded."""
+    subscriber = feed.subscribe(request.headers.get('Last-Event-ID'))
+    if subscriber is None:
+        return jsonify({"error": "Too many live connections"}), 503
+    
+    return Response(feed.stream(subscriber), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+archive = None
+
+
+def get_archive():
+    # Created on first use: the archive reader needs numpy.
+    global archive
+    if archive is None:
+        from src.utils.snapshot_archive import SnapshotArchive
+        archive = SnapshotArchive(BASE_DATA_PATH)
+    return archive
+
+
+@app.route("/api/archive")
+def get_archive_timestamps():
+    """Return the times of all archived coin-list snapshots"""
+    return jsonify(get_archive().timestamps())
+
+
+@app.route("/api/archive/snapshot")
+def get_archive_snapshot():
+    """Return the coin list as it was at ?at=2024-12-01T12:00:00Z (epoch seconds also work)"""
+    at = request.args.get('at')
     try:
-        valid_cryptos = [c for c in cryptos_list if c.get('price_change_percentage_24h') is not None]
-        if valid_cryptos:
-            top = max(valid_cryptos, key=lambda x: x.get('price_change_percentage_24h', -float('inf')))
-            return {
-                'name': top.get('name'),
-                'symbol': top.get('symbol'),
-                'change': top.get('price_change_percentage_24h')
-            }
-    except:
-        pass
-    return None
-
-
-def get_top_loser():
-    """Find cryptocurrency with lowest 24h percentage change"""
+        snapshot = get_archive().snapshot_at(at)
+    except ValueError:
+        return jsonify({"error": f"Invalid time {at}"}), 400
+    
+    if snapshot is None:
+        return jsonify({"error": "No snapshot archived before that time"}), 404
+    
+    return jsonify(snapshot)
+
+
+@app.route("/api/cryptos/<crypto_id>/archive")
+def get_crypto_archive(crypto_id):
+    """Return every archived change of one field, e.g. ?field=market_cap_rank&start=...&end=..."""
+    field = request.args.get('field', 'current_price')
     try:
-        valid_cryptos = [c for c in cryptos_list if c.get('price_change_percentage_24h') is not None]
-        if valid_cryptos:
-            bottom = min(valid_cryptos, key=lambda x: x.get('price_change_percentage_24h', float('inf')))
-            return {
-                'name': bottom.get('name'),
-                'symbol': bottom.get('symbol'),
-                'change': bottom.get('price_change_percentage_24h')
-            }
-    except:
-        pass
-    return None
+        history = get_archive().field_history(crypto_id, field,
+                                              request.args.get('start'), request.args.get('end'))
+    except ValueError:
+        return jsonify({"error": "Invalid start or end time"}), 400
+    
+    return jsonify({'crypto_id': crypto_id, 'field': field, 'history': history})
+
+
+@app.route("/api/stats")
+def get_market_stats():
+    """Return overall market statistics (precomputed with the snapshot)"""
+    return jsonify(market_stats)
 
 if __name__ == "__main__":
-    app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
+    # threaded: each open /api/stream connection keeps one worker thread busy
+    app.run(debug=True, host='0.0.0.0', port=5001, threaded=True)
\ No newline at end of file
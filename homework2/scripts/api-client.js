@@ -59,6 +59,78 @@ class CryptoAPI {
         }
     }
 
+    async getCryptoIndicators(cryptoId) {
+        try {
+            const response = await fetch(`${this.baseURL}/cryptos/${cryptoId}/indicators`);
+            if (!response.ok) {
+                return null;
+            }
+            return await response.json();
+        } catch (error) {
+            console.error('Error fetching crypto indicators:', error);
+            return null;
+        }
+    }
+
+    // Chart points for a date range at the resolution the backend picks for `points` pixels
+    // (day, week or month buckets). Tiles have content-hashed URLs, so the browser cache
+    // serves them again on pan and zoom. Returns null if the backend has no tiles.
+    async getChartSeries(cryptoId, start, end, points = 1000) {
+        try {
+            const params = new URLSearchParams({ points });
+            if (start) params.set('start', start);
+            if (end) params.set('end', end);
+            const response = await fetch(`${this.baseURL}/cryptos/${cryptoId}/tiles?${params}`);
+            if (!response.ok) {
+                return null;
+            }
+            const view = await response.json();
+            const origin = this.baseURL.replace(/\/api$/, '');
+            const tiles = await Promise.all(view.tiles.map(tile =>
+                fetch(`${origin}${tile.url}`).then(r => r.json())
+            ));
+
+            const rows = [];
+            tiles.forEach(tile => tile.rows.forEach(row => {
+                const point = {};
+                view.fields.forEach((field, i) => point[field] = row[i]);
+                rows.push(point);
+            }));
+            // Buckets start on their first day, so keep the one containing `start`
+            let first = rows.findIndex(row => row.date > view.start);
+            if (first === -1) first = rows.length;
+            return {
+                resolution: view.resolution,
+                lastDate: view.last_date,
+                rows: rows.slice(Math.max(first - 1, 0)).filter(row => row.date <= view.end)
+            };
+        } catch (error) {
+            console.error('Error fetching chart tiles:', error);
+            return null;
+        }
+    }
+
+    // Live price / 24h change / rank updates pushed by the backend (Server-Sent Events).
+    // onChanges gets {id: {field: value} | null}; onReset means the full list should be reloaded.
+    subscribeToMarketChanges(onChanges, onReset) {
+        if (typeof EventSource === 'undefined') {
+            return null;
+        }
+        const source = new EventSource(`${this.baseURL}/stream`);
+        source.addEventListener('changes', (event) => {
+            try {
+                onChanges(JSON.parse(event.data).changes);
+            } catch (error) {
+                console.error('Error applying market changes:', error);
+            }
+        });
+        source.addEventListener('reset', () => {
+            if (onReset) onReset();
+        });
+        source.onerror = () => console.log('Live updates disconnected, the browser will reconnect');
+        return source;
+    }
+
     async getMarketStats() {
         try {
             const response = await fetch(`${this.baseURL}/stats`);
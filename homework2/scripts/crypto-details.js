@@ -1,5 +1,8 @@
 // crypto-details.js - Complete version with all historical data columns
 
+let displayedCrypto = null;
+let marketFeed = null;
+
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Crypto Details page loaded');
     
@@ -206,7 +209,42 @@ function displayCryptoDetails(crypto, history) {
     
     // Initialize chart if historical data exists
     if (history && history.length > 0) {
-        setTimeout(() => initializePriceChart(history, crypto.symbol), 100);
+        setTimeout(() => initializePriceChart(crypto.id, crypto.symbol), 100);
+    }
+    
+    // Live price, 24h change and rank for the coin on screen
+    displayedCrypto = crypto;
+    if (!marketFeed) {
+        marketFeed = cryptoAPI.subscribeToMarketChanges(applyMarketChanges, reloadDisplayedCrypto);
+    }
+}
+
+function applyMarketChanges(changes) {
+    if (!displayedCrypto || !changes[displayedCrypto.id]) return;
+    Object.assign(displayedCrypto, changes[displayedCrypto.id]);
+    updateLiveHeader(displayedCrypto);
+}
+
+async function reloadDisplayedCrypto() {
+    if (!displayedCrypto) return;
+    const details = await cryptoAPI.getCryptoDetails(displayedCrypto.id);
+    if (details && !details.error && details.id === displayedCrypto.id) {
+        displayedCrypto = details;
+        updateLiveHeader(details);
+    }
+}
+
+function updateLiveHeader(crypto) {
+    const priceChange24h = crypto.price_change_percentage_24h || 0;
+    const rank = document.querySelector('.crypto-rank');
+    const price = document.querySelector('.crypto-main-price h2');
+    const change = document.querySelector('.crypto-main-price .change');
+    
+    if (rank) rank.textContent = `Rank #${crypto.market_cap_rank || 'N/A'}`;
+    if (price) price.textContent = `$${formatPrice(crypto.current_price)}`;
+    if (change) {
+        change.className = `change ${priceChange24h > 0 ? 'positive' : priceChange24h < 0 ? 'negative' : 'neutral'}`;
+        change.textContent = `${priceChange24h > 0 ? '+' : ''}${priceChange24h.toFixed(2)}% (24h)`;
     }
 }
 
@@ -267,13 +305,16 @@ function formatDate(dateString) {
 
 // Chart functionality
 let priceChart = null;
-let fullHistoryData = [];
+let chartCryptoId = null;
+let chartLastDate = null;
+let chartRequest = 0;
 
-function initializePriceChart(history, symbol) {
-    fullHistoryData = history;
+function initializePriceChart(cryptoId, symbol) {
+    chartCryptoId = cryptoId;
+    chartLastDate = null;
     
     // Create the chart with all data initially
-    createChart(history, symbol, 'all');
+    filterChartData('all', symbol);
     
     // Add event listeners to chart control buttons
     const chartButtons = document.querySelectorAll('.chart-btn');
@@ -290,15 +331,35 @@ function initializePriceChart(history, symbol) {
     });
 }
 
-function filterChartData(range, symbol) {
-    let filteredData = fullHistoryData;
+function daysBefore(dateString, days) {
+    const date = new Date(`${dateString}T00:00:00Z`);
+    date.setUTCDate(date.getUTCDate() - days);
+    return date.toISOString().slice(0, 10);
+}
+
+// The chart is drawn from tiles only: long ranges come as weekly/monthly
+// rollups instead of thousands of daily points.
+async function filterChartData(range, symbol) {
+    const request = ++chartRequest;
+    const canvas = document.getElementById('priceChart');
+    const points = canvas ? canvas.clientWidth || 1000 : 1000;
     
+    let start = null;
     if (range !== 'all') {
-        const daysToShow = parseInt(range);
-        filteredData = fullHistoryData.slice(-daysToShow);
+        // Ranges count back from the coin's last stored day, which the tile listing reports
+        if (!chartLastDate) {
+            const all = await cryptoAPI.getChartSeries(chartCryptoId, null, null, points);
+            if (all) chartLastDate = all.lastDate;
+        }
+        if (chartLastDate) start = daysBefore(chartLastDate, parseInt(range) - 1);
     }
     
-    createChart(filteredData, symbol, range);
+    const series = await cryptoAPI.getChartSeries(chartCryptoId, start, null, points);
+    if (request !== chartRequest) return;   // a newer range was clicked meanwhile
+    if (!series) return;
+    chartLastDate = series.lastDate;
+    
+    createChart(series.rows, symbol, range);
 }
 
 function createChart(data, symbol, range) {
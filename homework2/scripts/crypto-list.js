@@ -27,12 +27,51 @@ async function initializeCryptoListPage() {
         // Update statistics
         updateListStatistics(allCryptos);
         
+        // Keep prices current without re-downloading the list
+        cryptoAPI.subscribeToMarketChanges(applyMarketChanges, reloadAllCryptos);
+        
     } catch (error) {
         console.error('Error initializing crypto list:', error);
         showErrorMessage('Failed to load cryptocurrency data');
     }
 }
 
+function applyMarketChanges(changes) {
+    const byId = new Map(allCryptos.map(crypto => [crypto.id, crypto]));
+    let rankChanged = false;
+    
+    // A coin that entered the list arrives with the feed fields only (no name,
+    // symbol or image), so fetch the whole list once instead
+    if (Object.entries(changes).some(([cryptoId, fields]) => fields !== null && !byId.has(cryptoId))) {
+        reloadAllCryptos();
+        return;
+    }
+    
+    for (const [cryptoId, fields] of Object.entries(changes)) {
+        const crypto = byId.get(cryptoId);
+        if (fields === null) {
+            byId.delete(cryptoId);
+            rankChanged = true;
+        } else {
+            rankChanged = rankChanged || 'market_cap_rank' in fields;
+            Object.assign(crypto, fields);
+        }
+    }
+    
+    if (rankChanged) {
+        allCryptos = [...byId.values()].sort(
+            (a, b) => (a.market_cap_rank || Infinity) - (b.market_cap_rank || Infinity)
+        );
+    }
+    applyFilters(false);
+}
+
+async function reloadAllCryptos() {
+    allCryptos = await cryptoAPI.getAllCryptos();
+    applyFilters(false);
+    updateListStatistics(allCryptos);
+}
+
 function displayCurrentPage() {
     const startIndex = (currentPage - 1) * itemsPerPage;
     const endIndex = startIndex + itemsPerPage;
@@ -172,7 +211,7 @@ function initializeFilters() {
     }
 }
 
-function applyFilters() {
+function applyFilters(resetPage = true) {
     const searchInput = document.getElementById('search-input');
     const marketCapFilter = document.getElementById('market-cap-filter');
     const priceChangeFilter = document.getElementById('price-change-filter');
@@ -204,7 +243,11 @@ function applyFilters() {
     }
     
     filteredCryptos = results;
-    currentPage = 1;
+    if (resetPage) {
+        currentPage = 1;
+    } else {
+        currentPage = Math.min(currentPage, Math.max(1, Math.ceil(filteredCryptos.length / itemsPerPage)));
+    }
     displayCurrentPage();
 }
 